@@ -1,10 +1,12 @@
 # app.py
 
+import functools
 import streamlit as st
-import google.generativeai as genai
-from docx import Document
-from io import BytesIO
-from rules_engine import build_llm_prompt
+from response_cache import ResponseCache
+from gemini_client import GeminiClient, preload
+from drafting import draft_nda, draft_docx
+from job_queue import JobQueue, DONE, FAILED
+from rules_engine import PARTY_ROLES, APPLICABLE_LAWS, LANGUAGES
 
 # --- PAGE CONFIGURATION ---
 st.set_page_config(
@@ -25,66 +27,123 @@ if "nda_text" not in st.session_state:
     st.session_state.nda_text = ""
 if "prompt" not in st.session_state:
     st.session_state.prompt = ""
+if "nda_clauses" not in st.session_state:
+    st.session_state.nda_clauses = {}
+if "prompt_report" not in st.session_state:
+    st.session_state.prompt_report = None
+if "draft_timings" not in st.session_state:
+    st.session_state.draft_timings = []
+if "job_id" not in st.session_state:
+    # The id of the pending draft is kept in the URL, so a reload picks it up again
+    st.session_state.job_id = st.query_params.get("job")
+if "job_error" not in st.session_state:
+    st.session_state.job_error = None
+if "compliance" not in st.session_state:
+    st.session_state.compliance = None
+if "previous_draft" not in st.session_state:
+    # State (inputs, options, text and clauses) of the last draft, so the next one only redrafts what changed
+    st.session_state.previous_draft = None
+if "draft_inputs" not in st.session_state:
+    # The form inputs of the last draft, for its .docx and file name
+    st.session_state.draft_inputs = None
+
+# Gemini client settings
+GEMINI_TIMEOUT_SECONDS = 120
+GEMINI_RETRIES = 3
+HEDGE_SLOW_REQUESTS = False # send a duplicate request when the first one exceeds the recent p95 latency
+
+# Response cache settings
+CACHE_MAX_BYTES = 50 * 1024 * 1024
+CACHE_TTL_SECONDS = 7 * 24 * 3600
+
+# Background drafting settings
+JOB_WORKERS = 4 # drafts running at the same time, across every session
+JOB_POLL_SECONDS = 0.25 # the status only polls while a draft is pending, so the first text shows up quickly
+JOB_PROGRESS_SECONDS = 0.25 # minimum interval between two writes of the streamed text
+JOB_RETENTION_SECONDS = 24 * 3600 # finished drafts are deleted from the job store after this delay
 
 # --- FUNCTIONS ---
-def generate_contract_from_prompt(prompt):
-    """Calls the Google Gemini API to generate the contract text."""
-    
-    try:
-        # Configure the API key
-        genai.configure(api_key=api_key)
-        
-        # Set up the model generation configuration
-        generation_config = {
-            "temperature": 0.3,
-            "top_p": 1,
-            "top_k": 1,
-            "max_output_tokens": 8192,
-        }
+@st.cache_resource
+def preload_gemini_sdk():
+    """Starts importing the Gemini SDK in the background once per process, while the first page renders."""
+    preload()
+
+@st.cache_resource
+def get_gemini_client():
+    """Creates the Gemini client once per process; it is shared by every session."""
+    return GeminiClient(
+        api_key,
+        timeout=GEMINI_TIMEOUT_SECONDS,
+        retries=GEMINI_RETRIES,
+        hedge=HEDGE_SLOW_REQUESTS
+    )
 
-        # Initialize the Generative Model
-        model = genai.GenerativeModel(
-            model_name="gemini-2.5-flash-lite-preview-06-17",
-            generation_config=generation_config
+@st.cache_resource
+def get_response_cache():
+    """Opens the on-disk response cache once per process."""
+    return ResponseCache(max_bytes=CACHE_MAX_BYTES, ttl_seconds=CACHE_TTL_SECONDS)
+
+@st.cache_resource
+def get_job_queue():
+    """
+    Starts the background drafting workers once per process.
+    Drafts run off the script thread, so the page stays responsive while Gemini writes.
+    """
+    client, cache = get_gemini_client(), get_response_cache()
+
+    def run_draft(payload, progress):
+        return draft_nda(
+            payload["user_inputs"], client, cache, payload["options"],
+            on_text=progress, previous=payload.get("previous")
         )
 
-        with st.spinner("Drafting the NDA..."):
-            response = model.generate_content(prompt)
-        
-        return response.text
-        
-    except Exception as e:
-        st.error(f"An error occurred with the Gemini API: {e}")
-        return None
-
-def create_docx(text):
-    """Creates a Word document in memory from the given text."""
-    doc = Document()
-    doc.add_heading('Non-Disclosure Agreement', 0)
-    # Simple parsing: add paragraphs based on newlines
-    for para in text.split('\n'):
-        # Check if the line is likely a heading (e.g., "Article 1. Definitions")
-        if para.strip().lower().startswith(("article", "section")) or para.strip().endswith(":"):
-            doc.add_heading(para.strip(), level=2)
-        elif para.strip(): # Avoid adding empty paragraphs
-            doc.add_paragraph(para)
-    
-    # Save the document to a byte stream
-    bio = BytesIO()
-    doc.save(bio)
-    bio.seek(0)
-    return bio.getvalue()
+    return JobQueue(
+        run_draft,
+        max_workers=JOB_WORKERS,
+        progress_interval=JOB_PROGRESS_SECONDS,
+        retention_seconds=JOB_RETENTION_SECONDS
+    )
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def show_job_status():
+    """Polls the pending draft, showing its partial text until it is done."""
+    job = get_job_queue().get(st.session_state.job_id)
+    if job is None or job["status"] in (DONE, FAILED):
+        if job is None:
+            st.session_state.job_error = "The requested draft could not be found."
+            # e.g. pruned: drop it from the URL too, so the next reload starts afresh
+            st.query_params.pop("job", None)
+        elif job["status"] == FAILED:
+            st.session_state.job_error = f"An error occurred with the Gemini API: {job['error']}"
+        else:
+            result = job["result"]
+            st.session_state.nda_text = result["text"]
+            st.session_state.prompt = result["prompt"]
+            st.session_state.nda_clauses = result["clauses"]
+            st.session_state.prompt_report = result["prompt_report"]
+            st.session_state.compliance = result["compliance"]
+            st.session_state.draft_timings.append(result["metrics"])
+            st.session_state.previous_draft = result["state"]
+            st.session_state.draft_inputs = result["user_inputs"]
+        st.session_state.job_id = None
+        st.rerun()
+
+    if job["progress"]:
+        st.markdown(job["progress"])
+    else:
+        st.info("Your draft is queued..." if job["status"] == "queued" else "Drafting the NDA...")
 
 # --- UI LAYOUT ---
+preload_gemini_sdk()
+
 st.title("📄 Proof-of-Concept NDA Generator")
 st.markdown("This tool generates a first draft of a Non-Disclosure Agreement based on your selections. **All generated content must be reviewed by qualified legal counsel.**")
 
-# Use two columns for a cleaner layout
-col1, col2 = st.columns([1, 2])
-
-with col1:
-    st.header("Contract Details")
-    
+# The form, the document and the prompt are fragments: interacting with one of them
+# reruns only that region instead of the whole script.
+@st.fragment
+def draft_form():
+    """The contract details form; submitting it enqueues a draft and reruns the whole page to show it."""
     with st.form("nda_form"):
         client_name = st.text_input("Client Company Name (Party 1)", "OCP")
         client_type_and_address = st.text_input(
@@ -100,7 +159,7 @@ with col1:
         
         party_role = st.selectbox(
             "Which Party is our Client?",
-            ("Receiving Party", "Disclosing Party", "Both (Bilateral)")
+            PARTY_ROLES
         )
         
         purpose = st.text_area(
@@ -112,12 +171,12 @@ with col1:
         
         applicable_law = st.selectbox(
             "Applicable Law",
-            ("English Law", "French Law", "Moroccan Law")
+            APPLICABLE_LAWS
         )
 
         language = st.selectbox(
             "Language of the Contract",
-            ("English", "French")
+            LANGUAGES
         )
 
         duration = st.number_input(
@@ -139,51 +198,166 @@ with col1:
             ("Arbitration under ICC Rules, seat in Paris", "Arbitration under LCIA Rules, seat in London")
         )
         
+        bypass_cache = st.checkbox(
+            "Bypass response cache",
+            value=False,
+            help="Always call Gemini and redraft the whole agreement, even if an identical or similar draft was generated before."
+        )
+        
+        drafting_mode = st.radio(
+            "Drafting Mode",
+            ("Whole document", "Clause by clause (parallel)"),
+            horizontal=True,
+            help="Clause by clause sends one request per clause concurrently, reuses clauses that do not depend on the parties and, when a field changes, only redrafts the clauses using it."
+        )
+        
+        local_verbatim = st.checkbox(
+            "Insert verbatim clauses locally",
+            value=True,
+            help="Clauses that are already final legal text are inserted as is instead of being drafted by Gemini (English contracts only)."
+        )
+        
+        prefix_layout = st.checkbox(
+            "Cache-friendly prompt layout",
+            value=True,
+            help="Put the static rules first and the request values last, so prompts share a common prefix (whole document mode only)."
+        )
+        
+        stream_output = st.checkbox(
+            "Stream the draft as it is written",
+            value=True,
+            help="Show the text as soon as Gemini starts producing it (whole document mode only)."
+        )
+        
+        party_agnostic = st.checkbox(
+            "Reuse drafts across counterparties",
+            value=False,
+            help="Draft with placeholders for the party names, addresses and effective date, and fill them in afterwards, so the same terms for another counterparty need no new Gemini call."
+        )
+        
+        check_compliance = st.checkbox(
+            "Check and repair the draft",
+            value=False,
+            help="Look for missing clauses, leftover placeholders and inconsistent defined terms; only the missing mandatory clauses are requested again."
+        )
+        
+        exact_token_count = st.checkbox(
+            "Count prompt tokens exactly",
+            value=False,
+            help="Count the prompt tokens with Gemini's tokenizer instead of estimating them (one extra API call per prompt section, cache-friendly layout only)."
+        )
+        
         submitted = st.form_submit_button("Draft NDA", type="primary", use_container_width=True)
 
-if submitted:
-    user_inputs = {
-        "client_name": client_name,
-        "client_type_and_address": client_type_and_address,
-        "counterparty_name": counterparty_name,
-        "counterparty_type_and_address": counterparty_type_and_address,
-        "language": language,
-        "duration": duration,
-        "party_role": party_role,
-        "effective_date": date,
-        "nature_of_obligations": "Unilateral" if party_role != "Both (Bilateral)" else "Bilateral",
-        "purpose": purpose,
-        "applicable_law": applicable_law,
-        "litigation": litigation,
-    }
+    if submitted:
+        user_inputs = {
+            "client_name": client_name,
+            "client_type_and_address": client_type_and_address,
+            "counterparty_name": counterparty_name,
+            "counterparty_type_and_address": counterparty_type_and_address,
+            "language": language,
+            "duration": duration,
+            "party_role": party_role,
+            "effective_date": date,
+            "nature_of_obligations": "Unilateral" if party_role != "Both (Bilateral)" else "Bilateral",
+            "purpose": purpose,
+            "applicable_law": applicable_law,
+            "litigation": litigation,
+        }
+        options = {
+            "mode": "clause" if drafting_mode == "Clause by clause (parallel)" else "document",
+            "local_verbatim": local_verbatim,
+            "prefix_layout": prefix_layout,
+            "stream": stream_output,
+            "use_cache": not bypass_cache,
+            "check_compliance": check_compliance,
+            "party_agnostic": party_agnostic,
+            "exact_token_count": exact_token_count,
+        }
+        
+        # Enqueue the draft; the status in the document column polls it until it is done.
+        # Only the clauses affected by the changed fields are redrafted when possible.
+        st.session_state.job_id = get_job_queue().submit({
+            "user_inputs": user_inputs,
+            "options": options,
+            "previous": st.session_state.previous_draft,
+        })
+        st.session_state.job_error = None
+        st.query_params["job"] = st.session_state.job_id
+        st.rerun()
+
+@st.fragment
+def show_document():
+    """The generated document, its timings, the compliance notes and the download button."""
+    st.markdown(st.session_state.nda_text)
     
-    # Build the prompt (No changes needed in rules_engine.py)
-    st.session_state.prompt = build_llm_prompt(user_inputs)
+    if st.session_state.draft_timings:
+        timing = st.session_state.draft_timings[-1]
+        stages, tokens = timing["stages"], timing["tokens"]
+        st.caption(
+            f"First text after {stages.get('time_to_first_token', stages['total']):.2f}s, "
+            f"complete after {stages['total']:.2f}s"
+            + (" (from cache)" if timing["cached"] else f", {tokens['prompt']:,} prompt + {tokens['completion']:,} completion tokens")
+        )
+    
+    report = st.session_state.compliance
+    if report and not report["ok"]:
+        notes = []
+        if report["redrafted_topics"]:
+            notes.append(f"Missing clauses drafted again: {', '.join(report['redrafted_topics'])}.")
+        unresolved = [t for t in report["missing_topics"] if t not in report["redrafted_topics"]]
+        if unresolved:
+            notes.append(f"Clauses not found (check the draft): {', '.join(unresolved)}.")
+        if report["filled_placeholders"]:
+            notes.append(f"Placeholders filled in: {', '.join(report['filled_placeholders'])}.")
+        if report["unknown_placeholders"]:
+            notes.append(f"Placeholders to complete by hand: {', '.join(report['unknown_placeholders'])}.")
+        if report.get("party_token_fragments"):
+            notes.append(f"Party details to complete by hand: {', '.join(report['party_token_fragments'])}.")
+        for term, variants in report["inconsistent_terms"].items():
+            notes.append(f"\"{term}\" is also written {', '.join(repr(v) for v in variants)}.")
+        st.warning("**Compliance check**\n\n" + "\n".join(f"- {note}" for note in notes))
     
-    # Generate the contract using the new Gemini function
-    generated_text = generate_contract_from_prompt(st.session_state.prompt)
-    if generated_text:
-        st.session_state.nda_text = generated_text
+    # The docx is only produced when the button is clicked, from the document rendered (and memoized)
+    # while drafting; a party-agnostic draft only gets the party details filled in
+    draft_inputs = st.session_state.draft_inputs
+    st.download_button(
+        label="📥 Download as Word Document",
+        data=functools.partial(draft_docx, {"state": st.session_state.previous_draft, "user_inputs": draft_inputs}),
+        file_name=f"NDA_{draft_inputs['client_name'].replace(' ', '')}_{draft_inputs['counterparty_name'].replace(' ', '')}.docx",
+        mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        on_click="ignore",
+        use_container_width=True
+    )
+
+@st.fragment
+def show_prompt():
+    """Expander to see the prompt that was used."""
+    with st.expander("Show the AI Prompt"):
+        report = st.session_state.prompt_report
+        if report:
+            tokens = f"{report['total_tokens']:,} prompt tokens" if report.get("exact") else f"~{report['total_tokens']:,} prompt tokens (estimated)"
+            st.caption(f"{tokens}, {report['cacheable_share']:.0%} in the static prefix shared by every request with this role")
+            st.dataframe(report["sections"], use_container_width=True, hide_index=True)
+        st.code(st.session_state.prompt, language='markdown')
+
+# Use two columns for a cleaner layout
+col1, col2 = st.columns([1, 2])
+
+with col1:
+    st.header("Contract Details")
+    draft_form()
 
 with col2:
     st.header("Generated Document")
     
-    if st.session_state.nda_text:
-        st.markdown(st.session_state.nda_text)
-        
-        # Create docx in memory for download
-        docx_bytes = create_docx(st.session_state.nda_text)
-        
-        st.download_button(
-            label="📥 Download as Word Document",
-            data=docx_bytes,
-            file_name=f"NDA_{client_name.replace(' ', '')}_{counterparty_name.replace(' ', '')}.docx",
-            mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            use_container_width=True
-        )
-        
-        # Expander to see the prompt that was used
-        with st.expander("Show the AI Prompt"):
-            st.code(st.session_state.prompt, language='markdown')
+    if st.session_state.job_error:
+        st.error(st.session_state.job_error)
+    
+    if st.session_state.job_id:
+        show_job_status()
+    elif st.session_state.nda_text:
+        show_document()
+        show_prompt()
     else:
-        st.info("Fill out the form on the left and click 'Draft NDA' to generate the document.")
\ No newline at end of file
+        st.info("Fill out the form on the left and click 'Draft NDA' to generate the document.")
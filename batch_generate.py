@@ -0,0 +1,234 @@
+# batch_generate.py
+"""
+Headless bulk NDA generation.
+
+Reads a CSV or JSONL file of `user_inputs` records (the same keys build_llm_prompt
+expects), drafts them concurrently and writes one .docx per record. Finished
+records are appended to a checkpoint file so an interrupted run can be resumed.
+
+Usage: python batch_generate.py records.csv --out-dir ndas --workers 4 --rpm 30
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+
+from drafting import draft_nda, draft_docx
+from response_cache import ResponseCache
+from gemini_client import GeminiClient, load_api_key
+from rules_engine import PARTY_ROLES, APPLICABLE_LAWS, LANGUAGES
+
+REQUIRED_FIELDS = (
+    "client_name",
+    "client_type_and_address",
+    "counterparty_name",
+    "counterparty_type_and_address",
+    "language",
+    "duration",
+    "party_role",
+    "purpose",
+    "applicable_law",
+    "litigation",
+)
+# Fields restricted to the form's choices
+ALLOWED_VALUES = {
+    "party_role": PARTY_ROLES,
+    "applicable_law": APPLICABLE_LAWS,
+    "language": LANGUAGES,
+}
+
+class RateLimiter:
+    """Spaces out calls so that at most `per_minute` of them start every minute (thread-safe)."""
+
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+def read_records(path):
+    """Loads the records of a .csv or .jsonl file as a list of dicts."""
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith(".csv"):
+            records = list(csv.DictReader(f))
+        else:
+            records = [json.loads(line) for line in f if line.strip()]
+    return records
+
+def normalize_record(record, index):
+    """Validates a record and fills in the derived fields the app would normally set."""
+    missing = [field for field in REQUIRED_FIELDS if not record.get(field)]
+    if missing:
+        raise ValueError(f"Record {index} is missing required fields: {', '.join(missing)}")
+    user_inputs = dict(record)
+    user_inputs.setdefault("id", f"{index:05d}")
+    for field, allowed in ALLOWED_VALUES.items():
+        if user_inputs[field] not in allowed:
+            raise ValueError(
+                f"Record {user_inputs['id']} has an invalid {field} {user_inputs[field]!r} "
+                f"(expected one of: {', '.join(allowed)})"
+            )
+    if not user_inputs.get("nature_of_obligations"):
+        user_inputs["nature_of_obligations"] = "Unilateral" if user_inputs["party_role"] != "Both (Bilateral)" else "Bilateral"
+    if not user_inputs.get("effective_date"):
+        user_inputs["effective_date"] = "Today"
+    if not user_inputs.get("contract_type"):
+        # Empty CSV cell: use the default rule pack
+        user_inputs.pop("contract_type", None)
+    return user_inputs
+
+def output_filename(user_inputs):
+    """Same naming scheme as the app's download button, prefixed with the record id."""
+    name = f"{user_inputs['id']}_NDA_{user_inputs['client_name']}_{user_inputs['counterparty_name']}"
+    return re.sub(r"[^\w.-]", "", name.replace(" ", "")) + ".docx"
+
+def load_checkpoint(path):
+    """Returns the ids of the records already drafted by a previous run."""
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as f:
+        return {json.loads(line)["id"] for line in f if line.strip()}
+
+class RateLimitedClient:
+    """
+    Wraps a GeminiClient so that every request first waits for a RateLimiter slot.
+    Concurrent identical requests (e.g. party-agnostic records with the same terms) share one call.
+    """
+
+    def __init__(self, client, limiter):
+        self.client = client
+        self.limiter = limiter
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    @property
+    def model_name(self):
+        return self.client.model_name
+
+    def generate(self, prompt, on_usage=None, on_model=None):
+        with self._lock:
+            future = self._in_flight.get(prompt)
+            owner = future is None
+            if owner:
+                future = self._in_flight[prompt] = Future()
+        if not owner:
+            text, model_name = future.result()
+            if on_model is not None:
+                on_model(model_name)
+            return text
+        try:
+            self.limiter.wait()
+            answered = []
+            text = self.client.generate(prompt, on_usage=on_usage, on_model=answered.append)
+            future.set_result((text, answered[0]))
+            if on_model is not None:
+                on_model(answered[0])
+            return text
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[prompt]
+
+    def stream(self, prompt, on_usage=None, on_model=None):
+        self.limiter.wait()
+        return self.client.stream(prompt, on_usage=on_usage, on_model=on_model)
+
+    def count_tokens(self, text):
+        self.limiter.wait()
+        return self.client.count_tokens(text)
+
+def draft_record(user_inputs, client, cache, args):
+    """Drafts a single NDA and writes its .docx, returning the output path."""
+    result = draft_nda(
+        user_inputs,
+        client,
+        cache=cache,
+        options={
+            "mode": "clause" if args.by_clause else "document",
+            "local_verbatim": args.local_verbatim,
+            "prefix_layout": args.prefix_layout,
+            "stream": False,
+            "check_compliance": args.check_compliance,
+            "party_agnostic": args.party_agnostic,
+        },
+        metrics_mode="batch-clause" if args.by_clause else "batch"
+    )
+    path = os.path.join(args.out_dir, output_filename(user_inputs))
+    with open(path, "wb") as f:
+        # Already rendered (and memoized) by draft_nda
+        f.write(draft_docx(result))
+    return path
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Draft NDAs in bulk from a CSV or JSONL file of form inputs.")
+    parser.add_argument("input", help="CSV or JSONL file, one record of user_inputs per row/line.")
+    parser.add_argument("--out-dir", default="ndas", help="Directory where the .docx files are written.")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <out-dir>/checkpoint.jsonl).")
+    parser.add_argument("--workers", type=int, default=4, help="Number of concurrent drafts.")
+    parser.add_argument("--rpm", type=float, default=30, help="Maximum Gemini requests per minute (0 = unlimited).")
+    parser.add_argument("--retries", type=int, default=4, help="Retries per request on transient API errors.")
+    parser.add_argument("--backoff", type=float, default=2.0, help="Base delay in seconds of the exponential backoff.")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Deadline in seconds of a single Gemini request.")
+    parser.add_argument("--hedge", action="store_true", help="Send a duplicate request when one is slower than the recent p95 latency.")
+    parser.add_argument("--by-clause", action="store_true", help="Draft each clause with its own request, reusing party-independent clauses.")
+    parser.add_argument("--llm-verbatim", dest="local_verbatim", action="store_false", help="Let the LLM draft verbatim clauses too instead of inserting them locally.")
+    parser.add_argument("--prefix-layout", action="store_true", help="Put the static rules first and the record's values last (prefix-cache friendly).")
+    parser.add_argument("--compliance-check", dest="check_compliance", action="store_true", help="Scan the drafts for missing clauses, leftover placeholders and inconsistent defined terms, and redraft the missing mandatory clauses.")
+    parser.add_argument("--party-agnostic", action="store_true", help="Draft with party tokens and fill in each record's parties afterwards: records with the same terms share one Gemini call.")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the response cache.")
+    args = parser.parse_args(argv)
+
+    api_key = load_api_key()
+    if not api_key:
+        parser.error("GEMINI_API_KEY is not set (environment or .streamlit/secrets.toml).")
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    checkpoint_path = args.checkpoint or os.path.join(args.out_dir, "checkpoint.jsonl")
+    done = load_checkpoint(checkpoint_path)
+
+    records = [normalize_record(record, i) for i, record in enumerate(read_records(args.input), start=1)]
+    pending = [r for r in records if str(r["id"]) not in done]
+    print(f"{len(records)} records, {len(records) - len(pending)} already drafted, {len(pending)} to go.")
+
+    client = RateLimitedClient(
+        GeminiClient(api_key, timeout=args.timeout, retries=args.retries, backoff=args.backoff, hedge=args.hedge),
+        RateLimiter(args.rpm)
+    )
+    cache = ResponseCache(enabled=not args.no_cache)
+    failures = 0
+
+    with ThreadPoolExecutor(max_workers=args.workers) as pool, open(checkpoint_path, "a", encoding="utf-8") as checkpoint:
+        futures = {pool.submit(draft_record, r, client, cache, args): r for r in pending}
+        for future in as_completed(futures):
+            record_id = str(futures[future]["id"])
+            try:
+                path = future.result()
+            except Exception as e:
+                failures += 1
+                print(f"[{record_id}] failed: {e}", file=sys.stderr)
+                continue
+            # Results are collected on the main thread, so the checkpoint needs no lock
+            checkpoint.write(json.dumps({"id": record_id, "output": path}) + "\n")
+            checkpoint.flush()
+            print(f"[{record_id}] {path}")
+
+    print(f"Done: {len(pending) - failures} drafted, {failures} failed.")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+# benchmarks/bench_app.py
+"""
+Startup and rerun benchmark of the Streamlit app (app.py), with the stub model.
+
+- import: import time of each app module, in a fresh interpreter (python -X importtime)
+- first paint: the first run of the script, until the empty form is rendered (cold when this
+  benchmark runs on its own; run_all.py has already imported the app modules)
+- reruns: the script run of each interaction (checkbox change, "Draft NDA" click, the
+  status polls until the draft is shown, then a rerun with the draft on screen)
+
+AppTest always reruns the whole script, so the rerun figures are an upper bound of what
+a fragment (the form, the document or the prompt) costs when it reruns alone; "submit" counts
+two script runs, as the form fragment then reruns the whole page to show the pending draft.
+The app runs in a temporary directory, so the job store and the caches start empty.
+
+Usage: python benchmarks/bench_app.py [--latency 0.2] [--output-tokens 3000] [--json]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# google.generativeai warns about its own deprecation on import
+warnings.filterwarnings("ignore", category=FutureWarning)
+
+APP_PATH = os.path.join(ROOT, "app.py")
+APP_MODULES = ("gemini_client", "response_cache", "docx_export", "drafting", "job_queue")
+# Heavy dependencies the app should only import on first use
+DEFERRED_MODULES = ("google.generativeai", "docx")
+
+def import_times():
+    """Imports the app modules in a fresh interpreter; returns their cumulative import time in ms."""
+    code = "; ".join(f"import {name}" for name in APP_MODULES)
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-W", "ignore", "-c", code],
+        capture_output=True, text=True, cwd=ROOT, check=True
+    ).stderr
+    times, loaded = {}, set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        loaded.add(name.strip())
+        # Top-level entries only (nested imports are indented)
+        if name.strip() in APP_MODULES and name == " " + name.strip():
+            times[name.strip()] = int(cumulative) / 1000
+    times["total"] = sum(times.values())
+    times["deferred_loaded"] = [name for name in DEFERRED_MODULES if name in loaded]
+    return times
+
+def timed_run(at):
+    """Runs the script once; returns the time taken in milliseconds."""
+    start = time.perf_counter()
+    at.run()
+    return (time.perf_counter() - start) * 1000
+
+def run(latency=0.2, output_tokens=3000, poll_interval=0.1, timeout=60):
+    """Measures the import, first paint and rerun times; returns a summary dict (times in ms)."""
+    from streamlit.testing.v1 import AppTest
+
+    summary = {"import_ms": import_times()}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+            at.secrets["GEMINI_API_KEY"] = "stub"
+            # Measured before the SDK is patched below, so the first paint pays what a real one does
+            summary["first_paint_ms"] = timed_run(at)
+
+            import google.generativeai as genai
+            from stub_llm import StubConfig, stub_model_factory
+            factory = stub_model_factory(StubConfig(latency=latency, tokens_per_second=0, output_tokens=output_tokens, seed=42))
+            genai.GenerativeModel = lambda model_name, generation_config: factory(model_name, generation_config)
+
+            reruns = {}
+            at.checkbox[0].set_value(True)
+            reruns["form_change"] = timed_run(at)
+            at.checkbox[0].set_value(False)
+            at.button[0].click()
+            reruns["submit"] = timed_run(at)
+
+            polls, start = [], time.perf_counter()
+            while at.session_state.job_id and time.perf_counter() - start < timeout:
+                time.sleep(poll_interval)
+                polls.append(timed_run(at))
+            summary["draft_shown_ms"] = (time.perf_counter() - start) * 1000
+            reruns["status_poll"] = sum(polls[:-1]) / len(polls[:-1]) if len(polls) > 1 else None
+            reruns["draft_ready"] = polls[-1] if polls else None
+            reruns["with_draft"] = timed_run(at)
+            summary["rerun_ms"] = reruns
+            summary["exceptions"] = [e.value for e in at.exception]
+        finally:
+            os.chdir(cwd)
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.2, help="Median stub time to first token, in seconds.")
+    parser.add_argument("--output-tokens", type=int, default=3000, help="Stub response length in tokens.")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+    args = parser.parse_args()
+
+    r = run(args.latency, args.output_tokens)
+    if args.json:
+        print(json.dumps(r, indent=2))
+        return
+    print("Import (fresh interpreter)")
+    for name in APP_MODULES + ("total",):
+        print(f"  {name:<22} {r['import_ms'].get(name, 0):10.1f} ms")
+    print(f"  deferred modules loaded: {', '.join(r['import_ms']['deferred_loaded']) or 'none'}")
+    print(f"First paint:               {r['first_paint_ms']:10.1f} ms")
+    print(f"Submit to draft shown:     {r['draft_shown_ms']:10.1f} ms")
+    print("Reruns")
+    for name, value in r["rerun_ms"].items():
+        print(f"  {name:<22} {value:10.1f} ms" if value is not None else f"  {name:<22} {'-':>10}")
+    for error in r["exceptions"]:
+        print(f"Exception: {error}")
+
+if __name__ == "__main__":
+    main()
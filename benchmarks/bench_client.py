@@ -0,0 +1,100 @@
+# benchmarks/bench_client.py
+"""
+Tail-latency harness for gemini_client.GeminiClient, running against the local stub model.
+
+Fires `--requests` prompts from `--concurrency` threads, with and without hedged
+requests, and reports p50/p95/p99/max latency, failures and how many model calls
+were made (hedges and retries included).
+
+Usage: python benchmarks/bench_client.py --requests 300 --slow-rate 0.05 --failure-rate 0.02
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gemini_client import GeminiClient
+from stub_llm import StubConfig, stub_model_factory
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q / 100))] if samples else None
+
+def run(config, hedge, requests=300, concurrency=16, timeout=5.0, retries=3, backoff=0.01):
+    """Runs the load through a fresh client and returns its latency summary."""
+    factory = stub_model_factory(config)
+    client = GeminiClient(
+        model_name="stub-primary",
+        fallback_model_name="stub-fallback",
+        timeout=timeout,
+        retries=retries,
+        backoff=backoff,
+        hedge=hedge,
+        max_workers=2 * concurrency,
+        model_factory=factory,
+    )
+
+    def one_request(i):
+        start = time.perf_counter()
+        try:
+            client.generate(f"prompt {i}")
+            return time.perf_counter() - start, None
+        except Exception as e:
+            return time.perf_counter() - start, type(e).__name__
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one_request, range(requests)))
+
+    latencies = [latency for latency, error in results if error is None]
+    return {
+        "hedge": hedge,
+        "requests": requests,
+        "failures": sum(1 for _, error in results if error is not None),
+        "model_calls": sum(model.calls for model in factory.models.values()),
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "max": max(latencies, default=None),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.05, help="Median stub latency in seconds.")
+    parser.add_argument("--slow-rate", type=float, default=0.05, help="Share of requests hitting the slow tail.")
+    parser.add_argument("--slow-factor", type=float, default=20.0, help="Latency multiplier of the slow tail.")
+    parser.add_argument("--failure-rate", type=float, default=0.02, help="Share of requests failing with a transient error.")
+    parser.add_argument("--timeout", type=float, default=5.0, help="Per-request deadline in seconds.")
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--backoff", type=float, default=0.01)
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+    args = parser.parse_args(argv)
+
+    config = StubConfig(
+        latency=args.latency,
+        slow_rate=args.slow_rate,
+        slow_factor=args.slow_factor,
+        failure_rate=args.failure_rate,
+        output_tokens=50,
+        seed=42,
+    )
+    options = dict(requests=args.requests, concurrency=args.concurrency, timeout=args.timeout, retries=args.retries, backoff=args.backoff)
+    results = [run(config, hedge=False, **options), run(config, hedge=True, **options)]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return results
+    for r in results:
+        print(
+            f"hedge={str(r['hedge']):<5}  p50={r['p50'] * 1000:7.1f} ms  p95={r['p95'] * 1000:7.1f} ms  "
+            f"p99={r['p99'] * 1000:7.1f} ms  max={r['max'] * 1000:7.1f} ms  failures={r['failures']}  model calls={r['model_calls']}"
+        )
+    return results
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# benchmarks/bench_docx.py
+"""
+Benchmark for docx_export.create_docx on small and very large NDAs.
+
+Compares the original line-by-line renderer, a cold render with the new engine and
+a memoized render (what a Streamlit rerun with an unchanged draft pays).
+
+Usage: python benchmarks/bench_docx.py [--pages 2 50 200] [--repeat 5] [--json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docx import Document
+from docx_export import create_docx, render_docx
+
+CLAUSE = """### Article {n}. Confidential Information
+
+**"Confidential Information"** means any information disclosed by the **Disclosing Party** to the **Receiving Party**, whether written, oral or electronic, including without limitation:
+
+1. technical data, know-how, designs and specifications;
+2. business plans, financial information and customer lists;
+3. any other information marked *confidential* at the time of disclosure.
+
+- The **Receiving Party** shall use the Confidential Information solely for the Purpose.
+- The **Receiving Party** shall not disclose the Confidential Information to any Third-Party.
+
+The obligations of this Article {n} survive the termination of this Agreement for the period set out in the Article on Duration, and the Parties acknowledge that any breach may cause irreparable harm for which damages would not be an adequate remedy.
+"""
+
+def sample_nda(pages):
+    """Builds a markdown NDA of roughly `pages` pages (about two clauses per page)."""
+    return "# NON-DISCLOSURE AGREEMENT\n\n" + "\n".join(CLAUSE.format(n=n) for n in range(1, 2 * pages + 1))
+
+def legacy_create_docx(text):
+    """The original create_docx, kept here as the baseline."""
+    doc = Document()
+    doc.add_heading('Non-Disclosure Agreement', 0)
+    for para in text.split('\n'):
+        if para.strip().lower().startswith(("article", "section")) or para.strip().endswith(":"):
+            doc.add_heading(para.strip(), level=2)
+        elif para.strip():
+            doc.add_paragraph(para)
+    bio = BytesIO()
+    doc.save(bio)
+    bio.seek(0)
+    return bio.getvalue()
+
+def best_of(func, text, repeat):
+    """Returns the fastest of `repeat` timed calls, in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+def run(pages=(2, 50, 200), repeat=5):
+    """Runs the benchmark for each document length and returns one result dict per length."""
+    results = []
+    for n in pages:
+        text = sample_nda(n)
+        legacy = best_of(legacy_create_docx, text, repeat)
+        cold = best_of(render_docx, text, repeat)
+        create_docx(text)
+        rerun = best_of(create_docx, text, repeat)
+        results.append({
+            "pages": n,
+            "words": len(text.split()),
+            "legacy_ms": legacy,
+            "cold_ms": cold,
+            "rerun_ms": rerun,
+        })
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[50], help="Approximate lengths of the NDA in pages.")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (best is reported).")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+    args = parser.parse_args()
+
+    results = run(args.pages, args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for r in results:
+        print(f"{r['pages']}-page NDA ({r['words']:,} words)")
+        print(f"  original create_docx:   {r['legacy_ms']:10.2f} ms")
+        print(f"  render_docx (cold):     {r['cold_ms']:10.2f} ms")
+        print(f"  create_docx (rerun):    {r['rerun_ms']:10.3f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# benchmarks/bench_pipeline.py
+"""
+End-to-end benchmark of the form-to-DOCX path under concurrent simulated sessions.
+
+Each session submits `--drafts` forms one after the other (distinct counterparties, so
+nothing is served from a cache unless --cache is given). A draft runs through the app's
+own pipeline (drafting.draft_nda): build the prompt, stream it through GeminiClient
+(backed by the stub model), merge the verbatim clauses and render the DOCX. Clause mode
+drafts clause by clause instead. The compliance check is off, as by default: the stub's text has
+no clause headings, so it would redraft the mandatory clauses and the figures would not compare
+with earlier runs.
+
+Usage: python benchmarks/bench_pipeline.py --sessions 8 --drafts 5 --latency 0.3 --tokens-per-second 400
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from drafting import draft_nda
+from response_cache import ResponseCache
+from gemini_client import GeminiClient
+from metrics import percentile
+from fixtures import ROLES, LAWS, LANGUAGES, make_inputs
+from stub_llm import StubConfig, stub_model_factory
+
+def draft_once(client, user_inputs, mode, cache):
+    """Runs one form submission end to end and returns its metrics."""
+    result = draft_nda(
+        user_inputs,
+        client,
+        cache=cache,
+        options={"mode": mode, "prefix_layout": False, "use_cache": cache is not None, "check_compliance": False},
+        record=False
+    )
+    return result["metrics"]
+
+def run(sessions=8, drafts=5, mode="document", stub_config=None, use_cache=False):
+    """Runs the simulated sessions concurrently and returns a summary dict."""
+    stub_config = stub_config or StubConfig()
+    factory = stub_model_factory(stub_config)
+    client = GeminiClient(
+        model_name="stub",
+        fallback_model_name=None,
+        retries=3,
+        backoff=0.05,
+        max_workers=max(16, sessions),
+        model_factory=factory
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ResponseCache(os.path.join(tmp, "responses.sqlite3")) if use_cache else None
+
+        def session(i):
+            results = []
+            for j in range(drafts):
+                combo = (i + j) % (len(ROLES) * len(LAWS) * len(LANGUAGES))
+                user_inputs = make_inputs(
+                    ROLES[combo % len(ROLES)],
+                    LAWS[combo // len(ROLES) % len(LAWS)],
+                    LANGUAGES[combo // (len(ROLES) * len(LAWS))],
+                    counterparty=f"Counterparty {i}-{j}"
+                )
+                try:
+                    results.append(draft_once(client, user_inputs, mode, cache))
+                except Exception as e:
+                    results.append({"error": type(e).__name__})
+            return results
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=sessions) as pool:
+            events = [event for results in pool.map(session, range(sessions)) for event in results]
+        elapsed = time.perf_counter() - start
+
+    completed = [e for e in events if "error" not in e]
+    summary = {
+        "mode": mode,
+        "sessions": sessions,
+        "drafts": len(events),
+        "failures": len(events) - len(completed),
+        "wall_time_s": elapsed,
+        "drafts_per_s": len(completed) / elapsed if elapsed else None,
+        "model_calls": sum(model.calls for model in factory.models.values()),
+        "completion_tokens": sum(e["tokens"]["completion"] for e in completed),
+    }
+    for stage in ("total", "time_to_first_token", "llm", "create_docx"):
+        values = [e["stages"][stage] for e in completed if stage in e["stages"]]
+        if values:
+            for q in (50, 95, 99):
+                summary[f"{stage}_p{q}_s"] = percentile(values, q)
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=8, help="Concurrent simulated users.")
+    parser.add_argument("--drafts", type=int, default=5, help="Drafts submitted by each session.")
+    parser.add_argument("--mode", choices=("document", "clause"), default="document")
+    parser.add_argument("--cache", action="store_true", help="Use a (fresh) response cache.")
+    parser.add_argument("--latency", type=float, default=0.3, help="Median stub time to first token, in seconds.")
+    parser.add_argument("--tokens-per-second", type=float, default=400, help="Stub output speed.")
+    parser.add_argument("--output-tokens", type=int, default=3000, help="Stub response length in tokens.")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of stub requests failing.")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    config = StubConfig(
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        output_tokens=args.output_tokens,
+        failure_rate=args.failure_rate,
+        seed=args.seed,
+    )
+    print(json.dumps(run(args.sessions, args.drafts, args.mode, config, args.cache), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+# benchmarks/bench_prompt.py
+"""
+Micro-benchmark for rules_engine.build_llm_prompt.
+
+Compares the precompiled per-role templates against the original implementation
+(rule walk + string concatenation + one str.replace pass per placeholder), for each
+role and across every role, law and language combination.
+
+Usage: python benchmarks/bench_prompt.py [--seconds 1.0] [--json]
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rules_engine import NDA_DRAFTING_RULES, GENERAL_DRAFTING_INSTRUCTIONS, get_role_key, build_llm_prompt
+from fixtures import ROLES, make_inputs, all_combinations
+
+def legacy_build_llm_prompt(user_inputs):
+    """The original build_llm_prompt, kept here as the baseline."""
+    role_key = get_role_key(user_inputs["party_role"])
+
+    prompt = f"""
+You are an expert legal AI assistant. Your task is to draft a complete Non-Disclosure Agreement based on the following context and specific clause-by-clause instructions.
+
+**OVERALL CONTEXT:**
+- This is a {user_inputs['nature_of_obligations']} Non-Disclosure Agreement.
+- Our Client's Role: {user_inputs['party_role']}.
+- Party 1 (Our Client): {user_inputs['client_name']}
+- Party 1 Type and Address: {user_inputs['client_type_and_address']}
+- Party 2 (Counterparty): {user_inputs['counterparty_name']}
+- Party 2 Type and Address: {user_inputs['counterparty_type_and_address']}
+- Purpose of Disclosure: {user_inputs['purpose']}
+- Applicable Law: {user_inputs['applicable_law']}
+- Dispute Resolution (Litigation): {user_inputs['litigation']}
+- Duration of Confidentiality: {user_inputs['duration']} months
+- Language of the Contract: {user_inputs['language']}
+- Effective Date: {user_inputs.get('effective_date', 'Today')}
+**DRAFTING INSTRUCTIONS - CLAUSE BY CLAUSE:**
+
+"""
+    for topic, rules in NDA_DRAFTING_RULES.items():
+        prompt += f"--- \n"
+        prompt += f"**Clause Topic: {topic}**\n"
+        if "instructions" in rules:
+            instruction_text = rules["instructions"]
+        else:
+            instruction_text = rules[role_key]
+        if isinstance(instruction_text, list):
+            for item in instruction_text:
+                prompt += f"- {item}\n"
+        else:
+            prompt += f"- {instruction_text}\n"
+
+    prompt += "\n--- \n"
+    prompt += "**FINAL FORMATTING INSTRUCTIONS:**\n"
+    prompt += GENERAL_DRAFTING_INSTRUCTIONS
+
+    prompt = prompt.replace("[Party 1 Name]", user_inputs['client_name'])
+    prompt = prompt.replace("[Party 2 Name]", user_inputs['counterparty_name'])
+    prompt = prompt.replace("[Party 1 Type and Address]", user_inputs['client_type_and_address'])
+    prompt = prompt.replace("[Party 2 Type and Address]", user_inputs['counterparty_type_and_address'])
+    prompt = prompt.replace("[Effective Date]", str(user_inputs.get('effective_date', 'Today')))
+    prompt = prompt.replace("[Party 1 Role]", user_inputs['party_role'])
+    prompt = prompt.replace("[Nature of Obligations]", user_inputs['nature_of_obligations'])
+    prompt = prompt.replace("[Language]", user_inputs['language'])
+    prompt = prompt.replace("[Duration]", str(user_inputs['duration']))
+    prompt = prompt.replace("[Purpose]", user_inputs['purpose'])
+    prompt = prompt.replace("[Applicable Law]", user_inputs['applicable_law'])
+    prompt = prompt.replace("[Litigation]", user_inputs['litigation'])
+    return prompt
+
+def prompts_per_second(build, inputs, seconds):
+    """Calls build() on the inputs in turn for about `seconds` and returns the call rate."""
+    calls = 0
+    cycle = itertools.cycle(inputs)
+    start = time.perf_counter()
+    deadline = start + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            build(next(cycle))
+        calls += 100
+    return calls / (time.perf_counter() - start)
+
+def run(seconds=1.0):
+    """Runs the benchmark and returns one result dict per input set."""
+    cases = [(party_role, [make_inputs(party_role)]) for party_role in ROLES]
+    cases.append(("all combinations", all_combinations()))
+
+    results = []
+    for name, inputs in cases:
+        for user_inputs in inputs:
+            # Both implementations must produce the exact same prompt
+            assert build_llm_prompt(user_inputs) == legacy_build_llm_prompt(user_inputs)
+        before = prompts_per_second(legacy_build_llm_prompt, inputs, seconds)
+        after = prompts_per_second(build_llm_prompt, inputs, seconds)
+        verbatim = prompts_per_second(lambda u: build_llm_prompt(u, local_verbatim=True), inputs, seconds)
+        prefix = prompts_per_second(lambda u: build_llm_prompt(u, prefix_layout=True), inputs, seconds)
+        results.append({
+            "case": name,
+            "legacy_prompts_per_s": before,
+            "prompts_per_s": after,
+            "local_verbatim_prompts_per_s": verbatim,
+            "prefix_layout_prompts_per_s": prefix,
+            "speedup": after / before,
+        })
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=1.0, help="Time spent per measurement.")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+    args = parser.parse_args()
+
+    results = run(args.seconds)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for r in results:
+        print(f"{r['case']:<18} before: {r['legacy_prompts_per_s']:>10,.0f} prompts/s   after: {r['prompts_per_s']:>10,.0f} prompts/s   speedup: {r['speedup']:.1f}x")
+
+if __name__ == "__main__":
+    main()
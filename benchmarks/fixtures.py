@@ -0,0 +1,40 @@
+# benchmarks/fixtures.py
+"""Form inputs shared by the benchmarks (same choices as the Streamlit form)."""
+
+import itertools
+
+ROLES = ("Receiving Party", "Disclosing Party", "Both (Bilateral)")
+LAWS = ("English Law", "French Law", "Moroccan Law")
+LANGUAGES = ("English", "French")
+
+SAMPLE_INPUTS = {
+    "client_name": "OCP",
+    "client_type_and_address": "Public Company, Casablanca, Morocco",
+    "counterparty_name": "Tech Solutions Inc.",
+    "counterparty_type_and_address": "Private Company, Paris, France",
+    "language": "English",
+    "duration": 36,
+    "party_role": "Receiving Party",
+    "effective_date": "2026-01-01",
+    "nature_of_obligations": "Unilateral",
+    "purpose": "For the purpose of the contemplated business relationship, will share confidential information.",
+    "applicable_law": "English Law",
+    "litigation": "Arbitration under ICC Rules, seat in Paris",
+}
+
+def make_inputs(party_role="Receiving Party", applicable_law="English Law", language="English", counterparty=None):
+    """Returns form inputs for the given choices, derived fields included."""
+    user_inputs = dict(
+        SAMPLE_INPUTS,
+        party_role=party_role,
+        applicable_law=applicable_law,
+        language=language,
+        nature_of_obligations="Unilateral" if party_role != "Both (Bilateral)" else "Bilateral",
+    )
+    if counterparty is not None:
+        user_inputs["counterparty_name"] = counterparty
+    return user_inputs
+
+def all_combinations():
+    """Form inputs for every (role, law, language) combination."""
+    return [make_inputs(*combo) for combo in itertools.product(ROLES, LAWS, LANGUAGES)]
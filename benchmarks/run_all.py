@@ -0,0 +1,130 @@
+# benchmarks/run_all.py
+"""
+Runs the whole offline benchmark suite (no network access needed) and writes comparable JSON.
+
+- prompt:   build_llm_prompt for every role, law and language combination
+- docx:     create_docx on small and very large drafts
+- client:   GeminiClient tail latency with and without hedging (stub model)
+- pipeline: form-to-DOCX under concurrent simulated sessions (stub model)
+- app:      app.py import, first paint and rerun times (stub model)
+
+Usage:
+    python benchmarks/run_all.py --output results.json
+    python benchmarks/run_all.py --quick --compare results.json --tolerance 0.25
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# google.generativeai warns about its own deprecation on import
+warnings.filterwarnings("ignore", category=FutureWarning)
+
+import bench_prompt
+import bench_docx
+import bench_client
+import bench_pipeline
+import bench_app
+from stub_llm import StubConfig
+
+# Metrics where a higher value is better; every other timing is lower-is-better
+HIGHER_IS_BETTER = ("prompts_per_s", "drafts_per_s")
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+def run_suite(quick=False):
+    """Runs every benchmark and returns the results as one JSON-serialisable dict."""
+    scale = 0.2 if quick else 1.0
+    stub = StubConfig(latency=0.2 * scale, tokens_per_second=2000, output_tokens=int(3000 * scale), seed=42)
+    tail = StubConfig(latency=0.05, slow_rate=0.05, slow_factor=20, failure_rate=0.02, output_tokens=50, seed=42)
+    requests = int(300 * scale)
+
+    return {
+        "meta": {
+            "timestamp": time.time(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "quick": quick,
+        },
+        "prompt": bench_prompt.run(seconds=0.5 * scale),
+        "docx": bench_docx.run(pages=(2, 50) if quick else (2, 50, 200), repeat=3),
+        "client": [
+            bench_client.run(tail, hedge=False, requests=requests),
+            bench_client.run(tail, hedge=True, requests=requests),
+        ],
+        "pipeline": [
+            bench_pipeline.run(sessions=8, drafts=int(5 * scale) or 1, mode="document", stub_config=stub),
+            bench_pipeline.run(sessions=8, drafts=int(5 * scale) or 1, mode="clause", stub_config=stub),
+        ],
+        "app": bench_app.run(latency=stub.latency, output_tokens=stub.output_tokens),
+    }
+
+def flatten(results, prefix=""):
+    """Flattens the numeric results to {"pipeline.0.total_p95_s": value, ...}."""
+    flat = {}
+    items = results.items() if isinstance(results, dict) else enumerate(results)
+    for key, value in items:
+        name = f"{prefix}{key}"
+        if isinstance(value, (dict, list)):
+            flat.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+def compare(baseline, current, tolerance):
+    """Prints the metrics that got worse than `tolerance` (relative) and returns how many did."""
+    old, new = flatten(baseline), flatten(current)
+    regressions = 0
+    for name in sorted(old.keys() & new.keys()):
+        if name.startswith("meta.") or not old[name]:
+            continue
+        if not name.endswith(("_s", "_ms")) and not name.endswith(HIGHER_IS_BETTER):
+            continue
+        change = (new[name] - old[name]) / old[name]
+        worse = -change if name.endswith(HIGHER_IS_BETTER) else change
+        if worse > tolerance:
+            regressions += 1
+            print(f"REGRESSION {name}: {old[name]:.6g} -> {new[name]:.6g} ({change:+.0%})")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--output", help="Write the JSON results to this file (default: stdout).")
+    parser.add_argument("--quick", action="store_true", help="Shorter runs, for smoke tests.")
+    parser.add_argument("--compare", help="Baseline JSON results to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown before a metric counts as a regression.")
+    args = parser.parse_args()
+
+    results = run_suite(quick=args.quick)
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(json.load(f), results, args.tolerance)
+        print(f"{regressions} regression(s) beyond {args.tolerance:.0%}.", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+# benchmarks/stub_llm.py
+"""
+Local stand-in for the Gemini API, used by the benchmarks.
+
+StubModel mimics the parts of genai.GenerativeModel the app uses (generate_content,
+with and without stream=True, and request_options={"timeout": ...}). The latency,
+the token rate, the slow-tail and the failure rate are configurable, so the client
+layer and the drafting pipeline can be measured without network access.
+"""
+
+import random
+import threading
+import time
+from dataclasses import dataclass
+
+from google.api_core import exceptions as google_exceptions
+
+WORDS = ("the", "Receiving", "Party", "shall", "keep", "all", "Confidential", "Information", "strictly", "confidential", "and", "use", "it", "solely", "for", "Purpose")
+
+@dataclass
+class StubConfig:
+    latency: float = 0.2          # median time to first token, in seconds
+    jitter: float = 0.25          # sigma of the log-normal latency distribution
+    slow_rate: float = 0.0        # share of requests hitting the slow tail
+    slow_factor: float = 10.0     # latency multiplier of the slow tail
+    failure_rate: float = 0.0     # share of requests failing with ServiceUnavailable
+    tokens_per_second: float = 0  # output speed (0 = the whole text arrives with the first token)
+    output_tokens: int = 400      # length of each response, in tokens (about one word each)
+    seed: int | None = None
+
+class StubUsage:
+    def __init__(self, prompt_token_count, candidates_token_count):
+        self.prompt_token_count = prompt_token_count
+        self.candidates_token_count = candidates_token_count
+        self.total_token_count = prompt_token_count + candidates_token_count
+
+class StubResponse:
+    """Same shape as a Gemini response (or stream chunk): .text, .parts and .usage_metadata."""
+
+    def __init__(self, text, prompt_tokens=0, output_tokens=0):
+        self.text = text
+        self.parts = [text] if text else []
+        self.usage_metadata = StubUsage(prompt_tokens, output_tokens)
+
+class StubModel:
+    """Fake GenerativeModel with configurable latency, token rate and failure injection."""
+
+    def __init__(self, config=None, model_name="stub"):
+        self.config = config or StubConfig()
+        self.model_name = model_name
+        self.calls = 0
+        self._random = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+
+    def _sample(self):
+        """Draws (time to first token, fails?) for one request."""
+        with self._lock:
+            self.calls += 1
+            latency = self.config.latency * self._random.lognormvariate(0, self.config.jitter)
+            if self._random.random() < self.config.slow_rate:
+                latency *= self.config.slow_factor
+            fails = self._random.random() < self.config.failure_rate
+        return latency, fails
+
+    def _words(self, prompt):
+        seed = len(prompt)
+        return [WORDS[(seed + i) % len(WORDS)] for i in range(self.config.output_tokens)]
+
+    def _wait(self, seconds, deadline):
+        if deadline is not None and time.monotonic() + seconds > deadline:
+            time.sleep(max(0.0, deadline - time.monotonic()))
+            raise google_exceptions.DeadlineExceeded("stub deadline exceeded")
+        time.sleep(seconds)
+
+    def generate_content(self, prompt, stream=False, request_options=None):
+        timeout = (request_options or {}).get("timeout")
+        deadline = time.monotonic() + timeout if timeout else None
+        latency, fails = self._sample()
+        prompt_tokens = len(prompt) // 4
+        words = self._words(prompt)
+
+        if not stream:
+            generation_time = len(words) / self.config.tokens_per_second if self.config.tokens_per_second else 0.0
+            self._wait(latency + generation_time, deadline)
+            if fails:
+                raise google_exceptions.ServiceUnavailable("stub overloaded")
+            return StubResponse("### Stub Clause\n\n" + " ".join(words) + ".", prompt_tokens, len(words))
+        return self._stream(words, latency, fails, deadline, prompt_tokens)
+
+    def _stream(self, words, latency, fails, deadline, prompt_tokens):
+        self._wait(latency, deadline)
+        if fails:
+            raise google_exceptions.ServiceUnavailable("stub overloaded")
+        chunk_size = 20
+        yield StubResponse("### Stub Clause\n\n", prompt_tokens, 0)
+        for start in range(0, len(words), chunk_size):
+            chunk = words[start:start + chunk_size]
+            if self.config.tokens_per_second:
+                self._wait(len(chunk) / self.config.tokens_per_second, deadline)
+            yield StubResponse(" ".join(chunk) + " ", prompt_tokens, start + len(chunk))
+        # Gemini's last chunk only carries the finish reason
+        yield StubResponse("", prompt_tokens, len(words))
+
+def stub_model_factory(config=None):
+    """
+    Returns a GeminiClient model_factory creating one StubModel per model name.
+    The models it created are available in `factory.models`, e.g. to count calls.
+    """
+    def factory(model_name, generation_config):
+        factory.models[model_name] = StubModel(config, model_name=model_name)
+        return factory.models[model_name]
+    factory.models = {}
+    return factory
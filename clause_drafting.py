@@ -0,0 +1,93 @@
+# clause_drafting.py
+
+from concurrent.futures import ThreadPoolExecutor
+
+from rules_engine import (
+    DEFAULT_RULE_PACK, get_rule_pack, build_clause_prompts,
+    get_verbatim_topics, render_verbatim_clause, render_verbatim_body, get_affected_topics,
+)
+from response_cache import cache_key
+from gemini_client import MODEL_NAME, GENERATION_CONFIG
+
+def clause_cache_key(prompt, model_name=MODEL_NAME):
+    """
+    Cache key of a clause. A clause prompt only carries the form values the clause uses, so the
+    clauses that do not depend on the parties are shared between drafts, and editing the rules
+    changes the key.
+    """
+    return cache_key("clause", prompt, model_name, GENERATION_CONFIG)
+
+def draft_clauses(user_inputs, generate, cache=None, topics=None, local_verbatim=True, max_workers=8, model_name=MODEL_NAME):
+    """
+    Drafts each clause topic with its own LLM request, running the requests concurrently.
+    `generate(prompt, on_model)` must return the clause text and pass the name of the model that
+    answered to `on_model`; only the answers of `model_name` (the primary model) are cached.
+    Only `topics` are drafted if given. With `local_verbatim`, verbatim clauses are rendered locally instead.
+    Returns a dict {topic: clause text} in rule order.
+    """
+    prompts = build_clause_prompts(user_inputs)
+    topics = [t for t in get_rule_pack(user_inputs).rules if topics is None or t in topics]
+    verbatim_topics = get_verbatim_topics(user_inputs) if local_verbatim else frozenset()
+
+    def draft(topic):
+        if topic in verbatim_topics:
+            return render_verbatim_clause(topic, user_inputs)
+        key = clause_cache_key(prompts[topic], model_name)
+        text = cache.get(key) if cache is not None else None
+        if text is None:
+            answered = []
+            text = generate(prompts[topic], answered.append).strip()
+            # An empty clause, or one written by the fallback model, is never cached, so it is requested again next time
+            if cache is not None and text and answered == [model_name]:
+                cache.set(key, text)
+        return text
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        texts = list(pool.map(draft, topics))
+    return dict(zip(topics, texts))
+
+def assemble_clauses(clauses, pack=DEFAULT_RULE_PACK):
+    """Joins the clause texts, in the rule order of `pack`, into the full agreement."""
+    return "\n\n".join(clauses[topic] for topic in pack.rules if topic in clauses)
+
+def splice_clauses(text, previous_clauses, clauses):
+    """
+    Replaces, in a drafted agreement, the previous text of each clause in `clauses` by its new text.
+    Returns None if a previous clause cannot be found in the agreement.
+    """
+    for topic, clause in clauses.items():
+        previous = previous_clauses.get(topic)
+        if not previous or previous not in text:
+            return None
+        text = text.replace(previous, clause, 1)
+    return text
+
+def redraft_clauses(previous, user_inputs, generate, cache=None, local_verbatim=True, max_workers=8, model_name=MODEL_NAME):
+    """
+    Redrafts only the clauses affected by the form changes since a `previous` draft (a dict with
+    its "user_inputs", "text" and "clauses") and splices them into its text.
+    The clauses of a whole-document draft are unknown, except the verbatim ones rendered locally.
+    Returns (text, clauses), or None if the changes need a full redraft.
+    """
+    topics = get_affected_topics(previous["user_inputs"], user_inputs)
+    if topics is None:
+        return None
+
+    previous_clauses = dict(previous["clauses"])
+    # In a whole-document draft, a verbatim clause is found by its text: its heading is the model's
+    verbatim_topics = get_verbatim_topics(previous["user_inputs"]) if local_verbatim and not previous["clauses"] else frozenset()
+    for topic in verbatim_topics:
+        previous_clauses[topic] = render_verbatim_body(topic, previous["user_inputs"])
+    if not topics <= previous_clauses.keys():
+        return None
+
+    redrafted = draft_clauses(
+        user_inputs, generate, cache=cache, topics=topics, local_verbatim=local_verbatim,
+        max_workers=max_workers, model_name=model_name
+    )
+    redrafted.update({topic: render_verbatim_body(topic, user_inputs) for topic in redrafted if topic in verbatim_topics})
+    text = splice_clauses(previous["text"], previous_clauses, redrafted)
+    if text is None:
+        return None
+    clauses = {**previous["clauses"], **redrafted} if previous["clauses"] else {}
+    return text, clauses
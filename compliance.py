@@ -0,0 +1,233 @@
+# compliance.py
+
+import functools
+import re
+
+from rules_engine import (
+    PLACEHOLDERS, get_role_key, get_rule_pack, get_topic_instructions, compile_template, fill_template,
+    get_verbatim_topics, render_verbatim_clause, replace_verbatim_markers,
+)
+from clause_drafting import draft_clauses, assemble_clauses
+from gemini_client import MODEL_NAME
+
+# Defined terms every draft uses (see CLAUSE_DRAFTING_INSTRUCTIONS), besides the packs' "defined_term"s
+DEFINED_TERMS = ("Confidential Information", "Disclosing Party", "Receiving Party")
+MANDATORY_MARKER = "(Mandatory)"
+
+# Lines that can hold a clause title: markdown headings, whole-line bold, "Article ..." and numbered titles
+_HEADING_PATTERN = r"^[ \t]*(?:#{1,6}[ \t].*|\*\*[^*\n]+\*\*[ \t]*:?|(?:Article|ARTICLE)\b.*|\d+(?:\.\d+)*\.?[ \t]+[A-Z].*)$"
+_HEADING_RE = re.compile(_HEADING_PATTERN)
+# A quoted term being defined, e.g. **"Representatives"** means / "Représentants" désigne
+_DEFINITION_PATTERN = r"""[*_]*["“«][ \t]*[*_]*(?P<defined>[A-Z\u00c0-\u00dd][^"”»*_\n]{0,60}?)[*_]*[ \t]*["”»][*_]*[ \t]+(?:shall[ \t]+)?(?:means?|refers?[ \t]+to|désigne|signifie)\b"""
+# Any capitalised bracketed text left by the model, but not markdown links nor [[...]] markers
+_PLACEHOLDER_PATTERN = r"(?<!\[)\[[A-Z][^\[\]\n]{0,60}\](?![\](])"
+# The numbering before a clause title: "Article 3 -", "ARTICLE IV:", "Section 2.1.", "3.", "3)"...
+_NUMBERING_RE = re.compile(r"^(?:(?:article|section|clause)\s+(?:\d+(?:\.\d+)*|[ivxlc]+)\b|\d+(?:\.\d+)*)\s*[.:)\-–—]*\s*", re.IGNORECASE)
+
+def heading_title(line):
+    """
+    Returns the title of a heading line, without its markup and numbering, or None for the
+    level-1 heading (the title of the whole document).
+    """
+    line = line.strip()
+    if line.startswith("# "):
+        return None
+    title = _NUMBERING_RE.sub("", line.lstrip("#").replace("*", "").strip())
+    return title.rstrip(" :.")
+
+def _alias_pattern(alias):
+    # Whole words; "-" and " " are interchangeable and a plural "s" is allowed
+    return r"[-\s]+".join(re.escape(word) for word in re.split(r"[-\s]+", alias)) + r"(?:e?s)?\b"
+
+@functools.lru_cache(maxsize=None)
+def get_scanner(pack):
+    """
+    Compiles (once per rule pack) the single multi-pattern regex used by scan_draft, the
+    title pattern of every topic and the canonical spelling of every defined term.
+    """
+    terms = list(DEFINED_TERMS) + [r["defined_term"] for r in pack.rules.values() if "defined_term" in r]
+    canonical = {term.lower(): term for term in terms}
+    scanner = re.compile(
+        "(?P<heading>" + _HEADING_PATTERN + ")"
+        + "|(?P<definition>" + _DEFINITION_PATTERN + ")"
+        + "|(?P<placeholder>" + _PLACEHOLDER_PATTERN + ")"
+        + r"|(?P<term>\b(?i:" + "|".join(re.escape(term) for term in sorted(canonical, key=len, reverse=True)) + r")\b)",
+        re.MULTILINE
+    )
+    # Anchored at the start of the title, longest alias first
+    topic_patterns = {
+        topic: re.compile(
+            "|".join(_alias_pattern(a) for a in sorted([topic] + rules.get("aliases", []), key=len, reverse=True)),
+            re.IGNORECASE
+        )
+        for topic, rules in pack.rules.items()
+    }
+    return scanner, topic_patterns, canonical
+
+def match_topic(title, topic_patterns):
+    """
+    Returns the topic a heading title belongs to: the one whose name or alias starts the title,
+    the longest match winning (so "Utilisation Autorisée" is Permitted Use, not Use of Confidential Information).
+    Returns None if no topic matches.
+    """
+    best, best_length = None, 0
+    for topic, pattern in topic_patterns.items():
+        match = pattern.match(title)
+        if match is not None and match.end() > best_length:
+            best, best_length = topic, match.end()
+    return best
+
+@functools.lru_cache(maxsize=None)
+def get_mandatory_topics(pack, role_key):
+    """Returns the topics with at least one "(Mandatory)" instruction for the given role."""
+    mandatory = set()
+    for topic, rules in pack.rules.items():
+        items = get_topic_instructions(rules, role_key)
+        if isinstance(items, str):
+            items = [items]
+        if any(MANDATORY_MARKER in item for item in items):
+            mandatory.add(topic)
+    return frozenset(mandatory)
+
+def find_preamble(text, end):
+    """Returns the offset of the first line of text (not a heading) before `end`, or None."""
+    offset = 0
+    for line in text[:end].splitlines(keepends=True):
+        if line.strip() and not _HEADING_RE.match(line):
+            return offset
+        offset += len(line)
+    return None
+
+def scan_draft(text, user_inputs, clauses=None):
+    """
+    Checks a draft against its rule pack in a single pass over the text:
+    - every clause topic is present: a heading titled after it, a definition of it (e.g. the "Representatives"
+      of a Definitions clause), or non-empty in `clauses` for clause drafts. The text before the first
+      clause heading is the pack's first topic, the preamble, which models seldom give a heading;
+    - no [Placeholder] is left unsubstituted,
+    - defined terms are always capitalised the same way.
+
+    Returns a JSON-serialisable report; "positions" holds the offset of the first heading of each
+    topic found (a heading counts for one topic at most, and a definition has no position), used to
+    merge missing clauses at their place.
+    """
+    pack = get_rule_pack(user_inputs)
+    scanner, topic_patterns, canonical = get_scanner(pack)
+    positions, placeholders, inconsistent = {}, {}, {}
+    defined = set()
+
+    for match in scanner.finditer(text):
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == "heading":
+            title = heading_title(value)
+            topic = match_topic(title, topic_patterns) if title else None
+            if topic is not None and topic not in positions:
+                positions[topic] = match.start()
+        elif kind == "definition":
+            topic = match_topic(match.group("defined"), topic_patterns)
+            if topic is not None:
+                defined.add(topic)
+        elif kind == "placeholder":
+            placeholders[value] = placeholders.get(value, 0) + 1
+        else:
+            term = canonical[value.lower()]
+            # All capitals (e.g. in a title) is consistent too
+            if value != term and value != term.upper():
+                inconsistent.setdefault(term, set()).add(value)
+
+    preamble = next(iter(pack.rules))
+    if preamble not in positions:
+        offset = find_preamble(text, min(positions.values(), default=len(text)))
+        if offset is not None:
+            positions[preamble] = offset
+
+    if clauses is not None:
+        # Clause drafts are assembled from known clauses; a topic is missing only if its clause is empty
+        positions = {topic: text.find(clause) for topic, clause in clauses.items() if clause.strip()}
+        defined = set()
+    missing = [topic for topic in pack.rules if topic not in positions and topic not in defined]
+    mandatory = get_mandatory_topics(pack, get_role_key(user_inputs["party_role"]))
+    return {
+        "missing_topics": missing,
+        "missing_mandatory": [topic for topic in missing if topic in mandatory],
+        "placeholders": placeholders,
+        "unknown_placeholders": [p for p in placeholders if p not in PLACEHOLDERS],
+        "inconsistent_terms": {term: sorted(variants) for term, variants in inconsistent.items()},
+        "positions": positions,
+        "ok": not missing and not placeholders and not inconsistent,
+    }
+
+def merge_missing_clauses(text, missing_clauses, positions, pack):
+    """
+    Inserts each missing clause after the clause of the previous topic (in rule order) found in
+    the draft, i.e. before the next clause heading found after it. A missing clause with no
+    previous topic found goes before the first clause found, and at the end when none was found.
+    """
+    topics = list(pack.rules)
+    offsets = sorted(positions.values())
+    insertions = {}
+    for topic, clause in missing_clauses.items():
+        earlier = [positions[t] for t in topics[:topics.index(topic)] if t in positions]
+        if earlier:
+            following = [offset for offset in offsets if offset > max(earlier)]
+            offset = following[0] if following else len(text)
+        else:
+            offset = offsets[0] if offsets else len(text)
+        insertions.setdefault(offset, []).append(clause)
+    # From the end, so the earlier offsets stay valid
+    for offset in sorted(insertions, reverse=True):
+        parts = [text[:offset].rstrip()] + insertions[offset]
+        if offset < len(text):
+            parts.append(text[offset:].lstrip())
+        text = "\n\n".join(part for part in parts if part)
+    return text
+
+def merge_verbatim_clauses(text, user_inputs):
+    """
+    Replaces the verbatim clause markers in a generated draft with the locally rendered clauses
+    (see rules_engine.replace_verbatim_markers). Clauses whose marker the LLM left out are inserted
+    at their place in rule order, like merge_missing_clauses.
+    """
+    text, merged = replace_verbatim_markers(text, user_inputs)
+    pack = get_rule_pack(user_inputs)
+    verbatim_topics = get_verbatim_topics(user_inputs)
+    missing = {topic: render_verbatim_clause(topic, user_inputs) for topic in pack.rules if topic in verbatim_topics and topic not in merged}
+    if not missing:
+        return text
+    return merge_missing_clauses(text, missing, scan_draft(text, user_inputs)["positions"], pack)
+
+def enforce_compliance(text, user_inputs, generate, cache=None, clauses=None, local_verbatim=True, model_name=MODEL_NAME):
+    """
+    Scans a draft and repairs what can be repaired without a full regeneration: known placeholders
+    are filled in locally and only the missing mandatory clauses are drafted (with `generate`, see
+    draft_clauses) and merged in; the other missing topics are only reported.
+    Clause drafts (`clauses` given) are repaired clause by clause and assembled again.
+    Returns (text, clauses, report); the report describes the draft before the repair.
+    """
+    pack = get_rule_pack(user_inputs)
+    report = scan_draft(text, user_inputs, clauses)
+    positions = report.pop("positions")
+    report["filled_placeholders"] = [p for p in report["placeholders"] if p in PLACEHOLDERS]
+    report["redrafted_topics"] = []
+
+    if report["missing_mandatory"]:
+        redrafted = draft_clauses(
+            user_inputs, generate, cache=cache, topics=report["missing_mandatory"],
+            local_verbatim=local_verbatim, model_name=model_name
+        )
+        redrafted = {topic: clause for topic, clause in redrafted.items() if clause.strip()}
+        report["redrafted_topics"] = list(redrafted)
+        if clauses is not None:
+            clauses = {topic: redrafted.get(topic, clauses.get(topic, "")) for topic in pack.rules if redrafted.get(topic) or clauses.get(topic)}
+        else:
+            # Before filling the placeholders, which would move the scanned positions
+            text = merge_missing_clauses(text, redrafted, positions, pack)
+    if report["filled_placeholders"]:
+        fill = lambda t: fill_template(compile_template(t), user_inputs)
+        if clauses is not None:
+            clauses = {topic: fill(clause) for topic, clause in clauses.items()}
+        text = fill(text)
+    if clauses is not None:
+        text = assemble_clauses(clauses, pack)
+    return text, clauses, report
@@ -0,0 +1,146 @@
+# docx_export.py
+
+import functools
+import hashlib
+import re
+import threading
+import zipfile
+from collections import OrderedDict
+from io import BytesIO
+from html import escape
+
+DOCUMENT_TITLE = "Non-Disclosure Agreement"
+BODY_FONT = "Calibri"
+BODY_FONT_SIZE = 11 # points
+
+# Number of rendered documents kept in memory (Streamlit reruns re-render the same text)
+RENDER_CACHE_SIZE = 16
+
+# One pattern per markdown block: heading, bullet item, numbered/lettered item, horizontal rule
+_BLOCK_RE = re.compile(
+    r"^\s*(?:"
+    r"(?P<hashes>#{1,6})\s+(?P<heading>.+?)\s*#*"
+    r"|(?P<rule>(?:-\s*){3,}|(?:\*\s*){3,}|(?:_\s*){3,})"
+    r"|[-*+]\s+(?P<bullet>.+)"
+    r"|(?P<number>\d{1,3}[.)]|[a-zA-Z][.)]|\([a-zA-Z0-9]{1,3}\))\s+(?P<item>.+)"
+    r")\s*$"
+)
+# Inline emphasis: **bold** (defined terms) and *italic*
+_INLINE_RE = re.compile(r"\*\*(?P<bold>.+?)\*\*|(?<![\w*])\*(?P<italic>[^*\s](?:[^*]*[^*\s])?)\*(?![\w*])")
+
+_render_cache = OrderedDict()
+_render_cache_lock = threading.Lock()
+
+@functools.lru_cache(maxsize=None)
+def _base_template(title=DOCUMENT_TITLE):
+    """Builds the pre-styled base document once per process and title, and returns it serialised."""
+    # python-docx is imported on first use, so importing this module stays cheap
+    from docx import Document
+    from docx.shared import Pt
+
+    doc = Document()
+    normal = doc.styles["Normal"]
+    normal.font.name = BODY_FONT
+    normal.font.size = Pt(BODY_FONT_SIZE)
+    normal.paragraph_format.space_after = Pt(6)
+    doc.add_heading(title, 0)
+    bio = BytesIO()
+    doc.save(bio)
+    return bio.getvalue()
+
+def _add_inline_runs(paragraph, text):
+    """Adds `text` to the paragraph, turning **bold** and *italic* spans into formatted runs."""
+    position = 0
+    for match in _INLINE_RE.finditer(text):
+        if match.start() > position:
+            paragraph.add_run(text[position:match.start()])
+        if match.group("bold") is not None:
+            paragraph.add_run(match.group("bold")).bold = True
+        else:
+            paragraph.add_run(match.group("italic")).italic = True
+        position = match.end()
+    if position < len(text):
+        paragraph.add_run(text[position:])
+
+def _is_bold_line(line):
+    """True for lines that are bold as a whole, which the model uses as clause titles."""
+    return line.startswith("**") and line.endswith("**") and line.count("**") == 2 and len(line) > 4
+
+def render_markdown(doc, text):
+    """Appends the generated markdown to the document in a single pass over its lines."""
+    # Looking a style up by name scans the whole styles part, so resolve the ids once per document
+    style_ids = {name: doc.styles[name].style_id for name in ("Heading 1", "Heading 2", "Heading 3", "List Bullet", "List Paragraph")}
+
+    def add_paragraph(text, style=None):
+        paragraph = doc.add_paragraph()
+        if style is not None:
+            paragraph._p.style = style_ids[style]
+        _add_inline_runs(paragraph, text)
+
+    for line in text.split("\n"):
+        line = line.strip()
+        if not line:
+            continue
+        match = _BLOCK_RE.match(line)
+        if match is None:
+            if _is_bold_line(line):
+                add_paragraph(line[2:-2].strip(), "Heading 2")
+            else:
+                add_paragraph(line)
+        elif match.group("heading") is not None:
+            # "#" is the agreement title, the clauses start at "##"
+            level = max(1, min(len(match.group("hashes")) - 1, 3))
+            add_paragraph(match.group("heading").replace("**", ""), f"Heading {level}")
+        elif match.group("rule") is not None:
+            continue
+        elif match.group("bullet") is not None:
+            add_paragraph(match.group("bullet"), "List Bullet")
+        else:
+            # Keep the model's own numbering: Word's automatic numbering would restart or continue unpredictably
+            add_paragraph(f"{match.group('number')} {match.group('item')}", "List Paragraph")
+
+def render_docx(text, title=DOCUMENT_TITLE):
+    """Renders the generated text into a .docx (bytes), starting from the base template."""
+    from docx import Document
+
+    doc = Document(BytesIO(_base_template(title)))
+    render_markdown(doc, text)
+    bio = BytesIO()
+    doc.save(bio)
+    return bio.getvalue()
+
+def create_docx(text, title=DOCUMENT_TITLE):
+    """
+    Creates a Word document in memory from the given text, under the given title.
+    The result is memoized by a hash of the title and text, so rendering an unchanged draft again is free.
+    """
+    digest = hashlib.sha256(f"{title}\n{text}".encode("utf-8")).digest()
+    with _render_cache_lock:
+        if digest in _render_cache:
+            _render_cache.move_to_end(digest)
+            return _render_cache[digest]
+
+    docx_bytes = render_docx(text, title)
+    with _render_cache_lock:
+        _render_cache[digest] = docx_bytes
+        while len(_render_cache) > RENDER_CACHE_SIZE:
+            _render_cache.popitem(last=False)
+    return docx_bytes
+
+def fill_docx(docx_bytes, values):
+    """
+    Replaces tokens (e.g. the party tokens of a party-agnostic draft) with their values directly
+    in the document XML of a rendered .docx, so the document is not rendered again.
+    A token is never split across runs: only ** and * markers start a new run.
+    """
+    pattern = re.compile("|".join(re.escape(token) for token in values))
+    source = zipfile.ZipFile(BytesIO(docx_bytes))
+    bio = BytesIO()
+    with zipfile.ZipFile(bio, "w", zipfile.ZIP_DEFLATED) as target:
+        for item in source.infolist():
+            data = source.read(item)
+            if item.filename == "word/document.xml":
+                xml = data.decode("utf-8")
+                data = pattern.sub(lambda match: escape(values[match.group(0)], quote=False), xml).encode("utf-8")
+            target.writestr(item, data)
+    return bio.getvalue()
@@ -0,0 +1,165 @@
+# drafting.py
+
+from rules_engine import (
+    get_role_key, get_rule_pack, build_llm_prompt, build_clause_prompts, prompt_token_report, estimate_tokens,
+    anonymize_inputs, party_values, substitute_parties, party_token_fragments,
+)
+from clause_drafting import draft_clauses, assemble_clauses, redraft_clauses
+from compliance import enforce_compliance, merge_verbatim_clauses
+from response_cache import cache_key, RefreshingCache
+from gemini_client import GENERATION_CONFIG
+from docx_export import create_docx, fill_docx
+from metrics import DraftMetrics, record_draft
+
+# Drafting options and their defaults (the form's checkboxes and the batch CLI flags)
+DEFAULT_OPTIONS = {
+    "mode": "document",       # "document" (one request) or "clause" (one request per clause)
+    "local_verbatim": True,   # insert verbatim clauses locally
+    "prefix_layout": True,    # static rules first, request values last
+    "stream": True,           # stream the document and report the partial text
+    "use_cache": True,        # read from the response cache
+    "check_compliance": False, # scan the draft, fill leftover placeholders and redraft missing mandatory clauses
+    "party_agnostic": False,  # draft with party tokens, substituted afterwards (reusable across counterparties)
+    "exact_token_count": False, # count the prompt report's tokens with the model's tokenizer (API calls) instead of estimating them
+}
+
+# Options that must match for a previous draft to be updated incrementally
+INCREMENTAL_OPTIONS = ("mode", "local_verbatim", "party_agnostic")
+
+def draft_nda(user_inputs, client, cache=None, options=None, on_text=None, metrics_mode=None, record=True, previous=None):
+    """
+    Drafts an NDA from the form inputs, without any UI: builds the prompt(s), calls Gemini through
+    `client` (anything with generate/stream like GeminiClient), merges the verbatim clauses and
+    renders the DOCX (memoized by create_docx).
+
+    `on_text(text)` receives the partial text while a document is streamed. Stage timings and
+    token usage are recorded through metrics.record_draft unless `record` is False.
+
+    With `party_agnostic`, the draft is written with symbolic party tokens instead of the names,
+    addresses and effective date (see rules_engine.anonymize_inputs), so its prompts, and therefore its
+    cached responses, are shared by every counterparty; the real values are substituted afterwards.
+
+    Given the "state" of an earlier draft as `previous`, only the clauses affected by the changed
+    inputs are redrafted and spliced into its text, when possible (see redraft_clauses). Bypassing
+    the cache (`use_cache` False) always redrafts the whole agreement, and replaces the cached responses.
+
+    Only the answers of the client's primary model (`client.model_name`) are cached, under its name.
+
+    With `check_compliance`, the draft is scanned against its rules (see compliance.enforce_compliance)
+    and only the mandatory clauses found missing are requested again; for a party-agnostic draft, the report
+    also lists the "party_token_fragments" left after the substitution.
+
+    Returns a dict with the inputs and options, the text, the prompt, the clauses (clause mode),
+    the prompt token report (prefix layout), the compliance report, the draft's metrics and its
+    "state" (the inputs, text and clauses as drafted, i.e. with the party tokens), to pass as `previous`.
+    """
+    options = {**DEFAULT_OPTIONS, **(options or {})}
+    clause_mode = options["mode"] == "clause"
+    draft = DraftMetrics(
+        role=get_role_key(user_inputs["party_role"]),
+        language=user_inputs["language"],
+        law=user_inputs["applicable_law"],
+        mode=metrics_mode or options["mode"]
+    )
+    result = {"user_inputs": user_inputs, "options": options, "clauses": {}, "prompt_report": None, "compliance": None}
+    party_agnostic = options["party_agnostic"]
+    # The inputs the draft is written from: the real ones, or the party-agnostic ones
+    inputs = anonymize_inputs(user_inputs) if party_agnostic else user_inputs
+    generate = lambda prompt, on_model=None: client.generate(prompt, on_usage=draft.add_usage, on_model=on_model)
+    model_name = client.model_name
+    if cache is not None and not options["use_cache"]:
+        cache = RefreshingCache(cache)
+
+    with draft.stage("build_prompt"):
+        if clause_mode:
+            prompt = "\n".join(build_clause_prompts(inputs).values())
+        else:
+            prompt = build_llm_prompt(
+                inputs,
+                local_verbatim=options["local_verbatim"],
+                prefix_layout=options["prefix_layout"]
+            )
+    result["prompt"] = prompt
+    if not clause_mode and options["prefix_layout"]:
+        count_tokens = client.count_tokens if options["exact_token_count"] else estimate_tokens
+        result["prompt_report"] = prompt_token_report(inputs, options["local_verbatim"], count_tokens)
+        result["prompt_report"]["exact"] = options["exact_token_count"]
+
+    redrafted = None
+    if options["use_cache"] and previous is not None and all(previous["options"][o] == options[o] for o in INCREMENTAL_OPTIONS):
+        with draft.stage("llm"):
+            redrafted = redraft_clauses(
+                previous, inputs, generate, cache=cache, local_verbatim=options["local_verbatim"], model_name=model_name
+            )
+
+    if redrafted is not None:
+        draft.labels["mode"] = metrics_mode or "incremental"
+        text, result["clauses"] = redrafted
+    elif clause_mode:
+        with draft.stage("llm"):
+            result["clauses"] = draft_clauses(
+                inputs, generate, cache=cache, local_verbatim=options["local_verbatim"], model_name=model_name
+            )
+        text = assemble_clauses(result["clauses"], get_rule_pack(inputs))
+    else:
+        key = cache_key(prompt, model_name, GENERATION_CONFIG)
+        text = cache.get(key) if cache is not None else None
+        draft.cached = text is not None
+        if text is None:
+            answered = []
+            with draft.stage("llm"):
+                if options["stream"]:
+                    chunks = []
+                    for chunk_text in client.stream(prompt, on_usage=draft.add_usage, on_model=answered.append):
+                        draft.mark("time_to_first_token")
+                        chunks.append(chunk_text)
+                        if on_text is not None:
+                            partial = "".join(chunks)
+                            on_text(substitute_parties(partial, user_inputs) if party_agnostic else partial)
+                    text = "".join(chunks)
+                else:
+                    text = generate(prompt, answered.append)
+            # An empty response (e.g. a blocked stream), or one written by the fallback model, is never cached
+            if cache is not None and text and answered == [model_name]:
+                cache.set(key, text)
+        if options["local_verbatim"]:
+            text = merge_verbatim_clauses(text, inputs)
+
+    if options["check_compliance"]:
+        with draft.stage("compliance"):
+            text, clauses, result["compliance"] = enforce_compliance(
+                text, inputs, generate,
+                cache=cache,
+                clauses=result["clauses"] or None,
+                local_verbatim=options["local_verbatim"],
+                model_name=model_name
+            )
+        result["clauses"] = clauses or {}
+
+    result["state"] = {"user_inputs": inputs, "options": options, "text": text, "clauses": result["clauses"]}
+    if party_agnostic:
+        with draft.stage("substitute_parties"):
+            result["clauses"] = {topic: substitute_parties(clause, user_inputs) for topic, clause in result["clauses"].items()}
+            text = substitute_parties(text, user_inputs)
+        report = result["compliance"]
+        if report is not None:
+            # Tokens the model wrote slightly wrong are not substituted
+            report["party_token_fragments"] = party_token_fragments(text)
+            report["ok"] = report["ok"] and not report["party_token_fragments"]
+
+    with draft.stage("create_docx"):
+        draft_docx(result)
+    result["text"] = text
+    result["metrics"] = record_draft(draft) if record else draft.to_dict()
+    return result
+
+def draft_docx(result):
+    """
+    Returns the .docx of a draft_nda result. A party-agnostic draft is rendered (and memoized) once
+    with its tokens, and each counterparty's document only gets the real values filled in.
+    """
+    state = result["state"]
+    title = get_rule_pack(state["user_inputs"]).document_name
+    if state["options"]["party_agnostic"]:
+        return fill_docx(create_docx(state["text"], title), party_values(result["user_inputs"]))
+    return create_docx(state["text"], title)
@@ -0,0 +1,223 @@
+# gemini_client.py
+
+import functools
+import itertools
+import os
+import random
+import threading
+import time
+import tomllib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+MODEL_NAME = "gemini-2.5-flash-lite-preview-06-17"
+FALLBACK_MODEL_NAME = "gemini-2.0-flash-lite"
+GENERATION_CONFIG = {
+    "temperature": 0.3,
+    "top_p": 1,
+    "top_k": 1,
+    "max_output_tokens": 8192,
+}
+
+SECRETS_PATH = os.path.join(".streamlit", "secrets.toml")
+
+def _genai():
+    # The Gemini SDK takes about a second to import, so it is only imported on first use (or by preload)
+    import google.generativeai as genai
+    return genai
+
+def preload():
+    """Imports the Gemini SDK in a background thread, so neither the first page nor the first request waits for it."""
+    threading.Thread(target=_genai, name="genai-preload", daemon=True).start()
+
+@functools.lru_cache(maxsize=1)
+def transient_errors():
+    """Errors worth retrying: rate limits, overload, deadlines and dropped connections."""
+    from google.api_core import exceptions as google_exceptions
+    return (
+        google_exceptions.ResourceExhausted,
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.DeadlineExceeded,
+        google_exceptions.InternalServerError,
+        TimeoutError,
+        ConnectionError,
+    )
+
+@functools.lru_cache(maxsize=1)
+def model_errors():
+    """Errors of the model itself (retired, unknown or not accessible): not retried, but worth the fallback model."""
+    from google.api_core import exceptions as google_exceptions
+    return (
+        google_exceptions.NotFound,
+        google_exceptions.PermissionDenied,
+    )
+
+def load_api_key():
+    """Reads GEMINI_API_KEY from the environment, falling back to the Streamlit secrets file."""
+    api_key = os.environ.get("GEMINI_API_KEY")
+    if api_key:
+        return api_key
+    try:
+        with open(SECRETS_PATH, "rb") as f:
+            return tomllib.load(f)["GEMINI_API_KEY"]
+    except (FileNotFoundError, KeyError):
+        return None
+
+def default_model_factory(model_name, generation_config):
+    """Creates a Gemini model (genai must already be configured)."""
+    return _genai().GenerativeModel(model_name=model_name, generation_config=generation_config)
+
+class LatencyTracker:
+    """Keeps the most recent request latencies to estimate percentiles (thread-safe)."""
+
+    def __init__(self, window=200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q):
+        """Returns the q-th percentile (0-100) of the recent latencies, or None without samples."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * q / 100))]
+
+    def __len__(self):
+        return len(self._samples)
+
+class GeminiClient:
+    """
+    Process-wide Gemini client shared by the app, the batch CLI and the background workers.
+
+    Models are created once and reused. Every request gets a deadline (`timeout`), transient
+    errors are retried with jittered exponential backoff, and once the primary model is
+    exhausted the request falls back to `fallback_model_name`. With `hedge=True`, a duplicate
+    request is sent when the first one is slower than the recent p95 latency, and whichever
+    answers first wins.
+    """
+
+    def __init__(self, api_key=None, model_name=MODEL_NAME, fallback_model_name=FALLBACK_MODEL_NAME,
+                 generation_config=GENERATION_CONFIG, timeout=120.0, retries=3, backoff=1.0,
+                 hedge=False, hedge_percentile=95, hedge_min_samples=20, max_workers=16,
+                 model_factory=default_model_factory):
+        if api_key is not None:
+            _genai().configure(api_key=api_key)
+        self.model_names = [name for name in (model_name, fallback_model_name) if name]
+        self.generation_config = generation_config
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.latency = LatencyTracker()
+        self._model_factory = model_factory
+        self._models = {}
+        self._models_lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gemini")
+
+    @property
+    def model_name(self):
+        return self.model_names[0]
+
+    def get_model(self, model_name):
+        """Returns the pooled model for `model_name`, creating it on first use."""
+        with self._models_lock:
+            if model_name not in self._models:
+                self._models[model_name] = self._model_factory(model_name, self.generation_config)
+            return self._models[model_name]
+
+    def _call(self, model_name, prompt):
+        start = time.perf_counter()
+        response = self.get_model(model_name).generate_content(prompt, request_options={"timeout": self.timeout})
+        self.latency.add(time.perf_counter() - start)
+        return response
+
+    def _hedged_call(self, model_name, prompt):
+        """Sends the request, plus a duplicate if it is slower than the recent p95 latency."""
+        threshold = self.latency.percentile(self.hedge_percentile) if len(self.latency) >= self.hedge_min_samples else None
+        if not self.hedge or threshold is None:
+            return self._call(model_name, prompt)
+
+        futures = [self._pool.submit(self._call, model_name, prompt)]
+        done, _ = wait(futures, timeout=threshold)
+        if not done:
+            futures.append(self._pool.submit(self._call, model_name, prompt))
+        # The first successful answer wins; fail only if every request failed
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+        raise futures[0].exception()
+
+    def _with_retries(self, request, on_model=None):
+        """
+        Runs request(model_name) with retries on transient errors, then on the fallback model.
+        A model error (e.g. a retired preview model) moves to the fallback model straight away.
+        `on_model` receives the name of the model that answered.
+        """
+        last_error = None
+        for model_name in self.model_names:
+            for attempt in range(self.retries + 1):
+                try:
+                    result = request(model_name)
+                    if on_model is not None:
+                        on_model(model_name)
+                    return result
+                except model_errors() as e:
+                    last_error = e
+                    break
+                except transient_errors() as e:
+                    last_error = e
+                    if attempt < self.retries:
+                        time.sleep(self.backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+        raise last_error
+
+    def generate_response(self, prompt, on_model=None):
+        """Generates a full response object for `prompt`. `on_model` receives the name of the model that answered."""
+        return self._with_retries(lambda model_name: self._hedged_call(model_name, prompt), on_model)
+
+    def generate(self, prompt, on_usage=None, on_model=None):
+        """
+        Generates the text for `prompt`. `on_usage` receives the response's usage metadata and
+        `on_model` the name of the model that answered (the fallback one after a failure).
+        """
+        response = self.generate_response(prompt, on_model)
+        if on_usage is not None:
+            on_usage(getattr(response, "usage_metadata", None))
+        return response.text
+
+    def count_tokens(self, text):
+        """Counts the tokens of `text` with the model's tokenizer (one API call, retried and falling back like a request)."""
+        return self._with_retries(lambda model_name: self.get_model(model_name).count_tokens(text)).total_tokens
+
+    def stream(self, prompt, on_usage=None, on_model=None):
+        """
+        Yields the text of `prompt`'s response chunk by chunk.
+        Failures before the first chunk are retried; a stream cut midway raises.
+        `on_usage` receives the usage metadata of the last chunk once the stream ends, and
+        `on_model` the name of the model that answered once the stream is open.
+        """
+        def open_stream(model_name):
+            stream = iter(self.get_model(model_name).generate_content(
+                prompt, stream=True, request_options={"timeout": self.timeout}
+            ))
+            # Pull the first chunk here so connection errors are retried
+            return stream, next(stream, None)
+
+        stream, first_chunk = self._with_retries(open_stream, on_model)
+        if first_chunk is None:
+            return
+        chunk = None
+        for chunk in itertools.chain([first_chunk], stream):
+            if not chunk.parts: # e.g. the final chunk only carries the finish reason
+                continue
+            yield chunk.text
+        if on_usage is not None:
+            on_usage(getattr(chunk, "usage_metadata", None))
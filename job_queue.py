@@ -0,0 +1,126 @@
+# job_queue.py
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_JOBS_PATH = os.path.join(".nda_jobs", "jobs.sqlite3")
+
+# Job statuses
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+class JobQueue:
+    """
+    Background job queue backed by a local SQLite job store and a bounded worker pool.
+
+    `handler(payload, progress)` runs a job in a worker thread and returns a JSON-serialisable
+    result; it may call `progress(partial)` to publish intermediate output (e.g. streamed text).
+    Jobs are stored on disk, so their status and result survive page reloads, and jobs that
+    were still queued or running when the process stopped are run again on the next start.
+    Finished jobs are deleted `retention_seconds` after they ended.
+    """
+
+    def __init__(self, handler, path=DEFAULT_JOBS_PATH, max_workers=4, progress_interval=0.5, retention_seconds=24 * 3600):
+        self.handler = handler
+        self.path = path
+        self.progress_interval = progress_interval
+        self.retention_seconds = retention_seconds
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                progress TEXT,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            )"""
+        )
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="nda-job")
+        self._resume()
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _resume(self):
+        """Re-queues the jobs interrupted by a previous shutdown."""
+        self.prune()
+        self._execute("UPDATE jobs SET status = ?, started_at = NULL WHERE status = ?", (QUEUED, RUNNING))
+        for (job_id,) in self._execute("SELECT id FROM jobs WHERE status = ? ORDER BY created_at", (QUEUED,)):
+            self._pool.submit(self._run, job_id)
+
+    def submit(self, payload):
+        """Stores a new job and schedules it; returns its id immediately."""
+        job_id = uuid.uuid4().hex
+        self.prune()
+        self._execute(
+            "INSERT INTO jobs (id, status, payload, created_at) VALUES (?, ?, ?, ?)",
+            (job_id, QUEUED, json.dumps(payload, default=str), time.time()),
+        )
+        self._pool.submit(self._run, job_id)
+        return job_id
+
+    def get(self, job_id):
+        """Returns the job as a dict (payload, progress and result decoded), or None if unknown."""
+        rows = self._execute(
+            "SELECT id, status, payload, progress, result, error, created_at, started_at, finished_at FROM jobs WHERE id = ?",
+            (job_id,),
+        )
+        if not rows:
+            return None
+        job = dict(zip(("id", "status", "payload", "progress", "result", "error", "created_at", "started_at", "finished_at"), rows[0]))
+        for field in ("payload", "progress", "result"):
+            if job[field] is not None:
+                job[field] = json.loads(job[field])
+        return job
+
+    def prune(self):
+        """Deletes the jobs finished more than `retention_seconds` ago (their payload holds a whole previous draft)."""
+        self._execute(
+            "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+            (DONE, FAILED, time.time() - self.retention_seconds),
+        )
+
+    def _run(self, job_id):
+        job = self.get(job_id)
+        if job is None or job["status"] != QUEUED:
+            return
+        self._execute("UPDATE jobs SET status = ?, started_at = ? WHERE id = ?", (RUNNING, time.time(), job_id))
+
+        last_update = None
+        def progress(partial):
+            # Throttled, so streaming a long document does not turn into thousands of writes;
+            # the first text is written at once
+            nonlocal last_update
+            now = time.monotonic()
+            if last_update is None or now - last_update >= self.progress_interval:
+                last_update = now
+                self._execute("UPDATE jobs SET progress = ? WHERE id = ?", (json.dumps(partial, default=str), job_id))
+
+        try:
+            result = self.handler(job["payload"], progress)
+        except Exception as e:
+            self._execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                (FAILED, f"{type(e).__name__}: {e}", time.time(), job_id),
+            )
+            return
+        self._execute(
+            "UPDATE jobs SET status = ?, result = ?, progress = NULL, finished_at = ? WHERE id = ?",
+            (DONE, json.dumps(result, default=str), time.time(), job_id),
+        )
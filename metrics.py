@@ -0,0 +1,201 @@
+# metrics.py
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+METRICS_DIR = ".nda_metrics"
+EVENTS_PATH = os.path.join(METRICS_DIR, "drafts.jsonl")
+PROMETHEUS_PATH = os.path.join(METRICS_DIR, "metrics.prom")
+
+# Histogram buckets (seconds) of the Prometheus export
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+LABELS = ("role", "language", "law", "mode")
+
+logger = logging.getLogger("nda.metrics")
+if not logger.handlers:
+    # One JSON line per draft on stderr, whatever the root logging configuration (none by default)
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+class DraftMetrics:
+    """
+    Stage timings and token counts of a single draft.
+
+    Stages are timed with `with draft.stage("llm"):`; `mark("time_to_first_token")` stores the
+    time elapsed since the draft started. Token counts are added from the responses' usage
+    metadata, possibly from several threads (clause mode).
+    """
+
+    def __init__(self, **labels):
+        self.labels = labels
+        self.stages = {}
+        self.tokens = {"prompt": 0, "completion": 0}
+        self.cached = False
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.stages[name] = self.stages.get(name, 0.0) + elapsed
+
+    def mark(self, name):
+        """Records the time elapsed since the start of the draft under `name` (first call only)."""
+        with self._lock:
+            self.stages.setdefault(name, time.perf_counter() - self._start)
+
+    def add_usage(self, usage_metadata):
+        """Adds the token counts of a Gemini response's usage_metadata."""
+        if usage_metadata is None:
+            return
+        with self._lock:
+            self.tokens["prompt"] += getattr(usage_metadata, "prompt_token_count", 0) or 0
+            self.tokens["completion"] += getattr(usage_metadata, "candidates_token_count", 0) or 0
+
+    def to_dict(self):
+        stages = dict(self.stages)
+        stages.setdefault("total", time.perf_counter() - self._start)
+        return {
+            "timestamp": self.started_at,
+            "labels": self.labels,
+            "cached": self.cached,
+            "stages": stages,
+            "tokens": dict(self.tokens),
+        }
+
+class MetricsRegistry:
+    """Aggregates the recorded drafts in memory and writes the Prometheus text file."""
+
+    def __init__(self):
+        self.loaded = False
+        self._lock = threading.Lock()
+        self._histograms = defaultdict(lambda: [0] * (len(LATENCY_BUCKETS) + 1) + [0.0])
+        self._tokens = defaultdict(int)
+        self._drafts = defaultdict(int)
+
+    def observe(self, event):
+        labels = tuple(str(event["labels"].get(name, "")) for name in LABELS)
+        with self._lock:
+            self._drafts[labels + (str(event["cached"]).lower(),)] += 1
+            for stage, seconds in event["stages"].items():
+                histogram = self._histograms[labels + (stage,)]
+                for i, bound in enumerate(LATENCY_BUCKETS):
+                    if seconds <= bound:
+                        histogram[i] += 1
+                histogram[len(LATENCY_BUCKETS)] += 1 # +Inf bucket, i.e. the count
+                histogram[-1] += seconds
+            for kind, count in event["tokens"].items():
+                self._tokens[labels + (kind,)] += count
+
+    def render(self):
+        """Returns the metrics in the Prometheus text exposition format."""
+        def label_text(values, extra_names):
+            names = LABELS + extra_names
+            return ",".join(f'{n}="{str(v).replace(chr(34), "")}"' for n, v in zip(names, values))
+
+        lines = [
+            "# HELP nda_drafts_total Number of drafted NDAs.",
+            "# TYPE nda_drafts_total counter",
+        ]
+        with self._lock:
+            for key, count in sorted(self._drafts.items()):
+                lines.append(f"nda_drafts_total{{{label_text(key, ('cached',))}}} {count}")
+            lines += [
+                "# HELP nda_stage_duration_seconds Duration of each drafting stage.",
+                "# TYPE nda_stage_duration_seconds histogram",
+            ]
+            for key, histogram in sorted(self._histograms.items()):
+                labels = label_text(key, ("stage",))
+                for bound, count in zip(LATENCY_BUCKETS, histogram):
+                    lines.append(f'nda_stage_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'nda_stage_duration_seconds_bucket{{{labels},le="+Inf"}} {histogram[len(LATENCY_BUCKETS)]}')
+                lines.append(f"nda_stage_duration_seconds_sum{{{labels}}} {histogram[-1]:.6f}")
+                lines.append(f"nda_stage_duration_seconds_count{{{labels}}} {histogram[len(LATENCY_BUCKETS)]}")
+            lines += [
+                "# HELP nda_tokens_total Prompt and completion tokens used.",
+                "# TYPE nda_tokens_total counter",
+            ]
+            for key, count in sorted(self._tokens.items()):
+                lines.append(f"nda_tokens_total{{{label_text(key, ('kind',))}}} {count}")
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+_file_lock = threading.Lock()
+
+def record_draft(draft, events_path=EVENTS_PATH, prometheus_path=PROMETHEUS_PATH):
+    """
+    Records a finished draft: logs it as a JSON line, appends it to the events file read by the
+    admin page and refreshes the Prometheus text file. Returns the recorded event.
+    """
+    event = draft.to_dict()
+    line = json.dumps(event, default=str)
+    logger.info(line)
+    with _file_lock:
+        if not registry.loaded:
+            # Start from the drafts recorded by previous runs (and by other processes such as the batch CLI)
+            for previous in load_events(events_path):
+                registry.observe(previous)
+            registry.loaded = True
+        registry.observe(event)
+        os.makedirs(os.path.dirname(events_path), exist_ok=True)
+        with open(events_path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+        # Write then rename, so a scraper never reads a half-written file
+        tmp_path = prometheus_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(registry.render())
+        os.replace(tmp_path, prometheus_path)
+    return event
+
+def load_events(events_path=EVENTS_PATH):
+    """Reads the recorded drafts back from the events file."""
+    if not os.path.exists(events_path):
+        return []
+    with open(events_path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def percentile(values, q):
+    """Nearest-rank percentile (0-100) of a list of numbers."""
+    values = sorted(values)
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(len(values) * q / 100))]
+
+def summarize(events, group_by=("role", "language", "law")):
+    """
+    Returns one row per label group and stage with p50/p95/p99 latency and average token usage.
+    """
+    groups = defaultdict(list)
+    for event in events:
+        groups[tuple(event["labels"].get(name, "") for name in group_by)].append(event)
+
+    rows = []
+    for key, group in sorted(groups.items()):
+        stages = sorted({stage for event in group for stage in event["stages"]})
+        for stage in stages:
+            values = [event["stages"][stage] for event in group if stage in event["stages"]]
+            rows.append({
+                **dict(zip(group_by, key)),
+                "stage": stage,
+                "drafts": len(values),
+                "p50 (s)": percentile(values, 50),
+                "p95 (s)": percentile(values, 95),
+                "p99 (s)": percentile(values, 99),
+                "avg prompt tokens": sum(e["tokens"]["prompt"] for e in group) / len(group),
+                "avg completion tokens": sum(e["tokens"]["completion"] for e in group) / len(group),
+            })
+    return rows
@@ -0,0 +1,41 @@
+# pages/admin.py
+
+import streamlit as st
+from metrics import load_events, summarize, registry, PROMETHEUS_PATH
+
+st.set_page_config(page_title="NDA Generator - Admin", page_icon="📊", layout="wide")
+
+st.title("📊 Drafting Latency & Token Usage")
+
+events = load_events()
+if not events:
+    st.info("No drafts recorded yet. Metrics appear here once an NDA has been drafted.")
+    st.stop()
+
+include_cached = st.checkbox("Include drafts served from the cache", value=False)
+if not include_cached:
+    events = [e for e in events if not e["cached"]]
+
+group_by = st.multiselect(
+    "Group by",
+    ("role", "language", "law", "mode"),
+    default=("role", "language", "law")
+)
+
+total_prompt = sum(e["tokens"]["prompt"] for e in events)
+total_completion = sum(e["tokens"]["completion"] for e in events)
+c1, c2, c3 = st.columns(3)
+c1.metric("Drafts", len(events))
+c2.metric("Prompt tokens", f"{total_prompt:,}")
+c3.metric("Completion tokens", f"{total_completion:,}")
+
+st.subheader("Latency per stage")
+st.dataframe(summarize(events, group_by=tuple(group_by)), use_container_width=True)
+
+with st.expander("Prometheus metrics"):
+    st.caption(f"Also written to `{PROMETHEUS_PATH}` after every draft (textfile collector format).")
+    try:
+        with open(PROMETHEUS_PATH, encoding="utf-8") as f:
+            st.code(f.read(), language="text")
+    except FileNotFoundError:
+        st.code(registry.render(), language="text")
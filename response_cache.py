@@ -0,0 +1,101 @@
+# response_cache.py
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = os.path.join(".nda_cache", "responses.sqlite3")
+
+def cache_key(*parts):
+    """Returns a content-addressed key (SHA-256) for the given JSON-serialisable parts."""
+    payload = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class ResponseCache:
+    """
+    Persistent on-disk cache of LLM responses, stored in a single SQLite file.
+
+    Entries expire after `ttl_seconds` and the least recently used ones are evicted
+    once the stored text exceeds `max_bytes`. Setting `enabled=False` bypasses the
+    cache entirely (nothing is read or written).
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=50 * 1024 * 1024, ttl_seconds=7 * 24 * 3600, enabled=True):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+
+    def get(self, key):
+        """Returns the cached text for `key`, or None on a miss or an expired entry."""
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            if now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        return value
+
+    def set(self, key, value):
+        """Stores `value` under `key`, then evicts expired and least recently used entries."""
+        if not self.enabled or value is None:
+            return
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now),
+            )
+            self._evict(now)
+
+    def _evict(self, now):
+        self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Drop the least recently used entries until we are back under the size cap
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall():
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+class RefreshingCache:
+    """
+    View of a cache that never returns an entry but still stores new ones: bypassing the cache
+    calls the model again and replaces what it had cached.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value):
+        self.cache.set(key, value)
@@ -0,0 +1,209 @@
+# rule_packs.py
+"""
+Registry of drafting rule packs.
+
+A rule pack is a set of clause rules (same shape as rules_engine.NDA_DRAFTING_RULES) for one
+contract type, optionally restricted to some roles, laws and languages. Packs are JSON or YAML
+files in the rule packs directory:
+
+    {
+        "name": "nda-french-law",
+        "contract_type": "NDA",
+        "document_name": "Non-Disclosure Agreement",
+        "roles": ["receiving", "disclosing", "mutual"],
+        "laws": ["French Law"],
+        "languages": ["*"],
+        "rules": {"Preamble and Parties": {"instructions": "..."}, ...}
+    }
+
+"document_name" (used in the prompts and as the title of the document) defaults to the
+contract type; "laws" and "languages" default to ["*"] (any value). The files are only read on the first
+lookup, each pack is validated once, and the (contract type, role, law, language) index is
+built at the same time, so selecting a pack is a fixed number of dict lookups however many
+packs are installed. A more specific law or language wins over "*". A pack file that cannot be
+loaded is logged and skipped; the other packs, and the default one, still apply.
+
+"roles" must be among ROLES: the form's "Which Party is our Client?" choices map to them
+(rules_engine.get_role_key), and the prompts describe the parties as disclosing and receiving
+information, for a purpose and a duration of confidentiality. Packs are therefore variants of
+a confidentiality agreement (another law, language or document name), not other contract types.
+"""
+
+import glob
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+
+RULE_PACKS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rule_packs")
+ANY = "*"
+# The role keys of the form's party roles, the only ones the prompts are written for
+ROLES = ("receiving", "disclosing", "mutual")
+
+logger = logging.getLogger("nda.rule_packs")
+
+# Optional keys of a clause topic, besides its instructions
+TOPIC_OPTIONS = {"description": str, "verbatim": bool, "defined_term": str, "aliases": list}
+
+class RulePackError(ValueError):
+    """Raised when a rule pack file cannot be loaded or is invalid."""
+
+@dataclass(frozen=True, eq=False)
+class RulePack:
+    """
+    A validated rule pack. Packs compare by identity, so they can be part of the keys of the
+    rules_engine template caches (the templates are compiled once per pack and role).
+    """
+    name: str
+    contract_type: str
+    document_name: str
+    rules: dict
+    roles: tuple
+    laws: tuple = (ANY,)
+    languages: tuple = (ANY,)
+    source: str = field(default="<builtin>", compare=False)
+
+def _is_instruction(value):
+    return isinstance(value, str) or (isinstance(value, list) and all(isinstance(item, str) for item in value))
+
+def validate_rules(rules, roles, source="<builtin>"):
+    """Checks that every topic has instructions for all roles (or shared ones) and well-typed options."""
+    if not isinstance(rules, dict) or not rules:
+        raise RulePackError(f"{source}: 'rules' must be a non-empty mapping of clause topics")
+    for topic, topic_rules in rules.items():
+        if not isinstance(topic_rules, dict):
+            raise RulePackError(f"{source}: topic '{topic}' must be a mapping")
+        if "instructions" in topic_rules:
+            keys = ["instructions"]
+        else:
+            keys = list(roles)
+            missing = [role for role in roles if role not in topic_rules]
+            if missing:
+                raise RulePackError(f"{source}: topic '{topic}' has no instructions for role(s) {', '.join(missing)}")
+        for key in keys:
+            if not _is_instruction(topic_rules[key]):
+                raise RulePackError(f"{source}: '{topic}' -> '{key}' must be a string or a list of strings")
+        for key, value in topic_rules.items():
+            if key in keys:
+                continue
+            if key not in TOPIC_OPTIONS and key not in roles:
+                raise RulePackError(f"{source}: topic '{topic}' has an unknown key '{key}'")
+            if key in TOPIC_OPTIONS and not isinstance(value, TOPIC_OPTIONS[key]):
+                raise RulePackError(f"{source}: '{topic}' -> '{key}' must be a {TOPIC_OPTIONS[key].__name__}")
+
+def _as_tuple(data, key, source, default=None):
+    value = data.get(key, default)
+    if isinstance(value, str):
+        value = [value]
+    if not value or not all(isinstance(v, str) for v in value):
+        raise RulePackError(f"{source}: '{key}' must be a non-empty list of strings")
+    return tuple(value)
+
+def parse_rule_pack(data, source):
+    """Builds a validated RulePack from the decoded content of a pack file."""
+    if not isinstance(data, dict):
+        raise RulePackError(f"{source}: a rule pack must be a mapping")
+    for key in ("name", "contract_type"):
+        if not isinstance(data.get(key), str) or not data[key]:
+            raise RulePackError(f"{source}: '{key}' is required")
+    document_name = data.get("document_name", data["contract_type"])
+    if not isinstance(document_name, str) or not document_name:
+        raise RulePackError(f"{source}: 'document_name' must be a non-empty string")
+    pack = RulePack(
+        name=data["name"],
+        contract_type=data["contract_type"],
+        document_name=document_name,
+        rules=data.get("rules"),
+        roles=_as_tuple(data, "roles", source),
+        laws=_as_tuple(data, "laws", source, [ANY]),
+        languages=_as_tuple(data, "languages", source, [ANY]),
+        source=source,
+    )
+    unknown = [role for role in pack.roles if role not in ROLES]
+    if unknown:
+        raise RulePackError(f"{source}: unknown role(s) {', '.join(unknown)} (expected {', '.join(ROLES)})")
+    validate_rules(pack.rules, pack.roles, source)
+    return pack
+
+def read_rule_pack(path):
+    """Loads and validates a .json, .yaml or .yml rule pack file."""
+    with open(path, encoding="utf-8") as f:
+        if path.lower().endswith(".json"):
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError as e:
+                raise RulePackError(f"{path}: {e}") from e
+        else:
+            try:
+                import yaml # only needed for YAML packs, so it is imported when one is read
+            except ImportError:
+                raise RulePackError(f"{path}: PyYAML is required to load YAML rule packs") from None
+            try:
+                data = yaml.safe_load(f)
+            except yaml.YAMLError as e:
+                raise RulePackError(f"{path}: {e}") from e
+    return parse_rule_pack(data, path)
+
+class RulePackRegistry:
+    """
+    Lazily loaded, indexed collection of rule packs.
+
+    `default` is registered first and answers any lookup no file pack matches more precisely
+    for its contract type. The pack files of `directory` are read, validated and indexed on
+    the first lookup only.
+    """
+
+    def __init__(self, default, directory=RULE_PACKS_DIR):
+        validate_rules(default.rules, default.roles, default.source)
+        self.default = default
+        self.directory = directory
+        self._index = None
+        self._lock = threading.Lock()
+
+    def _add(self, pack, packs, index):
+        """Registers a pack, or raises RulePackError and leaves `packs` and `index` untouched."""
+        if pack.name in packs:
+            raise RulePackError(f"{pack.source}: duplicate rule pack name '{pack.name}'")
+        keys = [
+            (pack.contract_type, role, law, language)
+            for role in pack.roles for law in pack.laws for language in pack.languages
+        ]
+        for key in keys:
+            if key in index and index[key] is not self.default:
+                raise RulePackError(f"{pack.source}: {key} is already covered by pack '{index[key].name}'")
+        packs[pack.name] = pack
+        index.update(dict.fromkeys(keys, pack))
+
+    def _load(self):
+        with self._lock:
+            if self._index is not None:
+                return
+            packs, index = {}, {}
+            self._add(self.default, packs, index)
+            paths = sorted(
+                path for pattern in ("*.json", "*.yaml", "*.yml")
+                for path in glob.glob(os.path.join(self.directory, pattern))
+            )
+            for path in paths:
+                try:
+                    self._add(read_rule_pack(path), packs, index)
+                except (RulePackError, OSError) as e:
+                    logger.warning("Skipping rule pack: %s", e)
+            self._index = index
+
+    def select(self, contract_type, role, law, language):
+        """Returns the most specific pack for these values; raises KeyError if none applies."""
+        if self._index is None:
+            self._load()
+        index = self._index
+        for key in (
+            (contract_type, role, law, language),
+            (contract_type, role, law, ANY),
+            (contract_type, role, ANY, language),
+            (contract_type, role, ANY, ANY),
+        ):
+            pack = index.get(key)
+            if pack is not None:
+                return pack
+        raise KeyError(f"No rule pack for {contract_type} ({role}, {law}, {language})")
@@ -1,17 +1,29 @@
 # rules_engine.py
 
+import functools
+import re
+
+from rule_packs import ROLES, RulePack, RulePackRegistry
+
 # Translated rules from "3.1 Instructions specific to NDAs"
+# Rules marked "verbatim" are final legal text: they can be rendered locally instead of being drafted
+# by the LLM ("defined_term" renders the text as the definition of that term).
+# "aliases" are other titles (English and French) of the clause in a generated draft: a heading belongs to
+# the topic whose name or alias starts its title, the longest one winning (see compliance.scan_draft).
 NDA_DRAFTING_RULES = {
     "Preamble and Parties": {
         "description": "The introductory section identifying the parties and effective date.",
+        "aliases": ["Preamble", "Parties", "Between", "Préambule", "Entre"],
         "instructions": "Draft a standard preamble for a Non-Disclosure Agreement between [Party 1 Name], [Party 1 Type and Address], and [Party 2 Name], [Party 2 Type and Address]. The effective date should be [Effective Date]. Clearly identify which party is the Disclosing Party and which is the Receiving Party based on the user's role selection. If it's a bilateral agreement, state that both parties will act as Disclosing and Receiving Parties."
     },
     "Purpose": {
         "description": "The 'Whereas' or 'Background' clause.",
+        "aliases": ["Purpose", "Background", "Whereas", "Recitals", "Objet", "Finalité"],
         "instructions": "Draft a 'Purpose' clause explaining why the confidential information is being shared. Use the following user-provided purpose: '[Purpose]'."
     },
     "Representatives": {
         "description": "Definition of who can receive the information.",
+        "aliases": ["Representative", "Représentant"],
         "receiving": [
             "Define 'Representatives' narrowly. Limit the scope strictly to what is needed for the Purpose.",
             "The Receiving Party's liability for misuse by Representatives should be limited to its employees and directors only. (Mandatory)"
@@ -24,6 +36,7 @@ NDA_DRAFTING_RULES = {
     },
     "Confidential Information": {
         "description": "The core definition of what is considered confidential.",
+        "aliases": ["Confidential Information", "Definition", "Information Confidentielle", "Informations Confidentielles", "Définition"],
         "receiving": [
             "Define 'Confidential Information' narrowly by listing the specific types of information to be shared. (Mandatory)",
             "Include a clause requiring information to be explicitly marked 'Confidential' to be protected (Optional, but preferred for Recipient).",
@@ -38,6 +51,9 @@ NDA_DRAFTING_RULES = {
     },
     "Third-Party" : {
         "description": "Definition of third-party entities and their obligations.",
+        "aliases": ["Third Party", "Third Parties", "Tiers"],
+        "verbatim": True,
+        "defined_term": "Third-Party",
         "receiving": [
             "Add as is : any natural person, legal person, corporate body, non-corporate body or any other entity, not being a Party to the Agreement nor a Representative of any of the Parties",
         ],
@@ -48,6 +64,7 @@ NDA_DRAFTING_RULES = {
     },
     "Permitted Use": {
         "description": "How the information can be used by the Parties.",
+        "aliases": ["Permitted Use", "Permitted Purpose", "Utilisation Autorisée"],
         "receiving": [
             "Use Confidential Information only for the defined 'Purpose'.",
             "Do not disclose Confidential Information to any third parties during and after the term of this Agreement."
@@ -73,6 +90,8 @@ NDA_DRAFTING_RULES = {
     # },
     "Legally Required Disclosure": {
         "description": "What happens if the Receiving Party is legally compelled to disclose information.",
+        "aliases": ["Required Disclosure", "Compelled Disclosure", "Disclosure Required by Law", "Divulgation Légale", "Divulgation Obligatoire"],
+        "verbatim": True,
         "receiving": [
             "The above provisions are applicable, unless: \n",
             "a) disclosure is required by binding law and non-disclosure could expose the Party bound by confidentiality to criminal or administrative responsibility or,\n",
@@ -90,6 +109,7 @@ NDA_DRAFTING_RULES = {
     },
     "Exclusions from Confidential Information": {
         "description": "What is not considered confidential.",
+        "aliases": ["Exclusion", "Exception"],
         "receiving": [
             "Information that is already public knowledge at the time of disclosure or becomes public through no fault of the Receiving Party.",
             "Information received from a third party without breach of any obligation of confidentiality.",
@@ -111,6 +131,7 @@ NDA_DRAFTING_RULES = {
     },
     "Use of Confidential Information": {
         "description": "How the Receiving Party can use the information.",
+        "aliases": ["Use", "Non-Use", "Confidentiality Obligation", "Obligations of Confidentiality", "Utilisation", "Obligations de Confidentialité"],
         "receiving": [
             "Each Party undertakes to keep the same standard of care in protecting such other Party’s Confidential Information as a Party normally employs to preserve and safeguard its own Confidential Information.",
             "Confidential Information may be disclosed solely to those Representatives of a Party who have a need to know such information for the purposes of the cooperation.",
@@ -131,12 +152,15 @@ NDA_DRAFTING_RULES = {
     },
     "Duration": {
         "description": "The term of the agreement and the survival of confidentiality obligations.",
+        "aliases": ["Duration", "Term", "Durée"],
         "instructions": ["The confidentiality obligations shall remain in effect for [Duration] months from the Effective Date. After this period, the Receiving Party's obligations regarding Confidential Information shall continue indefinitely for any information that remains confidential by its nature.\n",
                         "All information provided by the Disclosing Party shall remain the property of the Disclosing Party. The Receiving Party agrees to return [OR to destroy] all Confidential Information to the Disclosing Party within fifteen (15) calendar days of written demand by the Disclosing Party. The risk for the Receiving Party is to remain liable too long so duration should strictly cover the time where Confidential Information will be used."
         ]
     },
     "Responsibility": {
         "description": "Who is responsible for breaches by Representatives.",
+        "aliases": ["Responsibility", "Responsibilities", "Liability", "Limitation of Liability", "Responsabilité"],
+        "verbatim": True,
         "receiving": [
             "Each Party hereto is fully liable for damages to the other Party for any harm or damage caused to the other Party or that Party’s customers or business partners due to violation of the terms of this Agreement, including for any harm or damage caused by the breaching Party’s Representatives.",
         ],
@@ -147,6 +171,8 @@ NDA_DRAFTING_RULES = {
     },
     "Notices": {
         "description": "Standard boilerplate clause for notices.",
+        "aliases": ["Notice", "Notification"],
+        "verbatim": True,
         "receiving": "Any notifications and statements pursuant to this Agreement shall be made in writing and sent via courier services or via registered mail to the Parties’ addresses [Party 1 Type and Address] for [Party 1 Name] and [Party 2 Type and Address] for [Party 2 Name] set forth in the heading of this Agreement or to the e-mail addresses agreed between the Parties.",
         "disclosing": "Any notifications and statements pursuant to this Agreement shall be made in writing and sent via courier services or via registered mail to the Parties’ addresses [Party 1 Type and Address] for [Party 1 Name] and [Party 2 Type and Address] for [Party 2 Name] set forth in the heading of this Agreement or to the e-mail addresses agreed between the Parties.",
         "mutual": "Any notifications and statements pursuant to this Agreement shall be made in writing and sent via courier services or via registered mail to the Parties’ addresses [Party 1 Type and Address] for [Party 1 Name] and [Party 2 Type and Address] for [Party 2 Name] set forth in the heading of this Agreement or to the e-mail addresses agreed between the Parties."
@@ -154,14 +180,17 @@ NDA_DRAFTING_RULES = {
 
     "Applicable Law and Jurisdiction": {
         "description": "The legal framework for the contract.",
+        "aliases": ["Applicable Law", "Governing Law", "Jurisdiction", "Droit Applicable", "Loi Applicable", "Juridiction"],
         "instructions": "The governing law shall be [Applicable Law]. And should apply in any issue arising out of this Agreement."
     },
     "Litigation": {
         "description": "Dispute resolution mechanism.",
+        "aliases": ["Litigation", "Dispute", "Arbitration", "Litige", "Différend", "Arbitrage"],
         "instructions": " Any dispute, controversy, or claim arising out of, or in relation to, this Agreement, including the validity, invalidity, breach, or termination thereof, which may not be effectively settled by negotiations, shall be resolved by arbitration in accordance with the [Litigation] in force on the date on which the Notice of Arbitration is submitted in accordance with these Rules. The number of arbitrators shall be one. The seat of the arbitration shall be [Litigation]. The arbitral proceedings shall be conducted in [Language]."
     },
     "General Provisions": {
         "description": "Boilerplate clauses like 'Modification', 'Non Solicitation', 'Non Assignable'.",
+        "aliases": ["General Provisions", "Miscellaneous", "Final Provisions", "Dispositions Générales", "Dispositions Finales", "Divers"],
         "instructions": "Include standard boilerplate clauses for 'Non Solicitation', 'Modification', and 'Non Assignable'."
     },
 }
@@ -174,6 +203,11 @@ GENERAL_DRAFTING_INSTRUCTIONS = """
 - The final output should be a single, complete document, ready for signature. Do not include any of these instructions or any commentary in the final text.
 """
 
+# The choices offered by the form (and accepted from a batch file)
+PARTY_ROLES = ("Receiving Party", "Disclosing Party", "Both (Bilateral)")
+APPLICABLE_LAWS = ("English Law", "French Law", "Moroccan Law")
+LANGUAGES = ("English", "French")
+
 def get_role_key(party_role):
     """Translates user-friendly role to a dictionary key."""
     if party_role == "Receiving Party":
@@ -183,67 +217,429 @@ def get_role_key(party_role):
     else: # "Both"
         return "mutual"
 
-def build_llm_prompt(user_inputs):
-    """Builds a structured prompt for the LLM based on user inputs and rules."""
-    
-    role_key = get_role_key(user_inputs["party_role"])
+# Maps every placeholder used in the prompt to the user input it is filled with.
+PLACEHOLDERS = {
+    "[Party 1 Name]": lambda u: u['client_name'],
+    "[Party 2 Name]": lambda u: u['counterparty_name'],
+    "[Party 1 Type and Address]": lambda u: u['client_type_and_address'],
+    "[Party 2 Type and Address]": lambda u: u['counterparty_type_and_address'],
+    "[Effective Date]": lambda u: str(u.get('effective_date', 'Today')),
+    "[Party 1 Role]": lambda u: u['party_role'],
+    "[Nature of Obligations]": lambda u: u['nature_of_obligations'],
+    "[Language]": lambda u: u['language'],
+    "[Duration]": lambda u: str(u['duration']),
+    "[Purpose]": lambda u: u['purpose'],
+    "[Applicable Law]": lambda u: u['applicable_law'],
+    "[Litigation]": lambda u: u['litigation'],
+}
 
-    prompt = f"""
-You are an expert legal AI assistant. Your task is to draft a complete Non-Disclosure Agreement based on the following context and specific clause-by-clause instructions.
+# --- RULE PACKS ---
+# NDA_DRAFTING_RULES is the default pack; packs installed in rule_packs/ can add contract types
+# or replace the rules for specific laws and languages.
+DEFAULT_CONTRACT_TYPE = "NDA"
+DEFAULT_RULE_PACK = RulePack(
+    name="nda",
+    contract_type=DEFAULT_CONTRACT_TYPE,
+    document_name="Non-Disclosure Agreement",
+    rules=NDA_DRAFTING_RULES,
+    roles=ROLES,
+)
+RULE_PACKS = RulePackRegistry(DEFAULT_RULE_PACK)
+
+def get_rule_pack(user_inputs):
+    """Selects the rule pack for the request's contract type, role, applicable law and language."""
+    return RULE_PACKS.select(
+        user_inputs.get("contract_type", DEFAULT_CONTRACT_TYPE),
+        get_role_key(user_inputs["party_role"]),
+        user_inputs["applicable_law"],
+        user_inputs["language"],
+    )
+
+_PLACEHOLDER_RE = re.compile("(" + "|".join(re.escape(p) for p in PLACEHOLDERS) + ")")
+
+PROMPT_HEADER = """
+You are an expert legal AI assistant. Your task is to draft a complete {document_name} based on the following context and specific clause-by-clause instructions.
 
 **OVERALL CONTEXT:**
-- This is a {user_inputs['nature_of_obligations']} Non-Disclosure Agreement.
-- Our Client's Role: {user_inputs['party_role']}.
-- Party 1 (Our Client): {user_inputs['client_name']}
-- Party 1 Type and Address: {user_inputs['client_type_and_address']}
-- Party 2 (Counterparty): {user_inputs['counterparty_name']}
-- Party 2 Type and Address: {user_inputs['counterparty_type_and_address']}
-- Purpose of Disclosure: {user_inputs['purpose']}
-- Applicable Law: {user_inputs['applicable_law']}
-- Dispute Resolution (Litigation): {user_inputs['litigation']}
-- Duration of Confidentiality: {user_inputs['duration']} months
-- Language of the Contract: {user_inputs['language']}
-- Effective Date: {user_inputs.get('effective_date', 'Today')}
+- This is a [Nature of Obligations] {document_name}.
+- Our Client's Role: [Party 1 Role].
+- Party 1 (Our Client): [Party 1 Name]
+- Party 1 Type and Address: [Party 1 Type and Address]
+- Party 2 (Counterparty): [Party 2 Name]
+- Party 2 Type and Address: [Party 2 Type and Address]
+- Purpose of Disclosure: [Purpose]
+- Applicable Law: [Applicable Law]
+- Dispute Resolution (Litigation): [Litigation]
+- Duration of Confidentiality: [Duration] months
+- Language of the Contract: [Language]
+- Effective Date: [Effective Date]
 **DRAFTING INSTRUCTIONS - CLAUSE BY CLAUSE:**
 
 """
-    # Iterate through the rules and build the prompt chunk by chunk
-    for topic, rules in NDA_DRAFTING_RULES.items():
-        prompt += f"--- \n"
-        prompt += f"**Clause Topic: {topic}**\n"
-        
-        # Get the specific instructions based on the role
-        if "instructions" in rules:
-            # For clauses with single instruction set (Preamble, Purpose, etc.)
-            instruction_text = rules["instructions"]
-        else:
-            # For clauses with role-based instructions
-            instruction_text = rules[role_key]
 
-        # Format instructions nicely
-        if isinstance(instruction_text, list):
-            for item in instruction_text:
-                prompt += f"- {item}\n"
-        else:
-            prompt += f"- {instruction_text}\n"
+def get_topic_instructions(rules, role_key):
+    """Returns the instruction text of a clause topic for the given role."""
+    if "instructions" in rules:
+        # For clauses with single instruction set (Preamble, Purpose, etc.)
+        return rules["instructions"]
+    # For clauses with role-based instructions
+    return rules[role_key]
+
+def render_topic(topic, rules, role_key):
+    """Renders the prompt chunk for a single clause topic."""
+    instruction_text = get_topic_instructions(rules, role_key)
+    if isinstance(instruction_text, str):
+        instruction_text = [instruction_text]
+    return render_items(topic, instruction_text)
+
+def render_items(topic, items):
+    """Renders a clause topic heading followed by its instruction items."""
+    lines = [f"--- \n", f"**Clause Topic: {topic}**\n"]
+    lines.extend(f"- {item}\n" for item in items)
+    return "".join(lines)
+
+def compile_template(text):
+    """
+    Splits a text into a template tuple alternating literal chunks and placeholders.
+    Odd indexes always hold a placeholder, so filling it is a single pass.
+    """
+    return tuple(_PLACEHOLDER_RE.split(text))
 
+def fill_template(template, user_inputs):
+    """Substitutes the user inputs into a compiled template in a single pass."""
+    parts = list(template)
+    parts[1::2] = [PLACEHOLDERS[name](user_inputs) for name in template[1::2]]
+    return "".join(parts)
+
+@functools.lru_cache(maxsize=None)
+def get_prompt_template(role_key, verbatim_topics=frozenset(), pack=DEFAULT_RULE_PACK):
+    """
+    Compiles (once per rule pack and role) the full prompt template for the given role key.
+    The `verbatim_topics` are rendered locally, so the prompt only asks for their marker.
+    """
+    chunks = [PROMPT_HEADER.format(document_name=pack.document_name)]
+    for topic, rules in pack.rules.items():
+        if topic in verbatim_topics:
+            chunks.append(render_verbatim_marker_instructions(topic))
+        else:
+            chunks.append(render_topic(topic, rules, role_key))
     # Add general formatting instructions at the end
-    prompt += "\n--- \n"
-    prompt += "**FINAL FORMATTING INSTRUCTIONS:**\n"
-    prompt += GENERAL_DRAFTING_INSTRUCTIONS
-
-    # Replace placeholders in the prompt itself
-    prompt = prompt.replace("[Party 1 Name]", user_inputs['client_name'])
-    prompt = prompt.replace("[Party 2 Name]", user_inputs['counterparty_name'])
-    prompt = prompt.replace("[Party 1 Type and Address]", user_inputs['client_type_and_address'])
-    prompt = prompt.replace("[Party 2 Type and Address]", user_inputs['counterparty_type_and_address'])
-    prompt = prompt.replace("[Effective Date]", str(user_inputs.get('effective_date', 'Today')))
-    prompt = prompt.replace("[Party 1 Role]", user_inputs['party_role'])
-    prompt = prompt.replace("[Nature of Obligations]", user_inputs['nature_of_obligations'])
-    prompt = prompt.replace("[Language]", user_inputs['language'])
-    prompt = prompt.replace("[Duration]", str(user_inputs['duration']))
-    prompt = prompt.replace("[Purpose]", user_inputs['purpose'])
-    prompt = prompt.replace("[Applicable Law]", user_inputs['applicable_law'])
-    prompt = prompt.replace("[Litigation]", user_inputs['litigation'])
-
-    return prompt
\ No newline at end of file
+    chunks.append("\n--- \n")
+    chunks.append("**FINAL FORMATTING INSTRUCTIONS:**\n")
+    chunks.append(GENERAL_DRAFTING_INSTRUCTIONS)
+    return compile_template("".join(chunks))
+
+def build_llm_prompt(user_inputs, local_verbatim=False, prefix_layout=False):
+    """
+    Builds a structured prompt for the LLM based on user inputs and rules.
+    With `local_verbatim`, verbatim clauses are left out of the prompt; the model only emits
+    their marker, which compliance.merge_verbatim_clauses replaces afterwards.
+    With `prefix_layout`, the prompt starts with the static rules and ends with the request values
+    (see build_prompt_sections).
+    """
+    if prefix_layout:
+        return "".join(text for _, text in build_prompt_sections(user_inputs, local_verbatim))
+    role_key = get_role_key(user_inputs["party_role"])
+    verbatim_topics = get_verbatim_topics(user_inputs) if local_verbatim else frozenset()
+    prompt = fill_template(get_prompt_template(role_key, verbatim_topics, get_rule_pack(user_inputs)), user_inputs)
+    return prompt + PARTY_TOKEN_INSTRUCTIONS if user_inputs.get("party_tokens") else prompt
+
+# --- VERBATIM CLAUSES ---
+# The verbatim rules are written in English; other languages still need the LLM to translate them.
+VERBATIM_LANGUAGES = ("English",)
+
+_VERBATIM_DIRECTIVE_RE = re.compile(r"^\s*Add as is\s*:\s*", re.IGNORECASE)
+# A marker line, alone or as the title of a heading the model numbered like its other clauses
+_VERBATIM_MARKER_RE = re.compile(r"^(?P<prefix>[^\S\n]*[^\[\n`]*?)`?\[\[Clause: (?P<topic>[^\]\n]+)\]\]`?(?P<suffix>[^\n]*)$", re.MULTILINE)
+_VERBATIM_HEADING_RE = re.compile(r"^\s*(?:#|\*\*|\d|(?:article|section|clause)\b)", re.IGNORECASE)
+
+def verbatim_marker(topic):
+    """The marker the LLM emits in place of a verbatim clause."""
+    return f"[[Clause: {topic}]]"
+
+def render_verbatim_marker_instructions(topic):
+    """Renders the prompt chunk asking the LLM to emit only the heading of a verbatim clause, titled with its marker."""
+    return (
+        f"--- \n"
+        f"**Clause Topic: {topic}**\n"
+        f"- This clause is inserted automatically. Output only its heading, formatted and numbered like the other clauses, "
+        f"with exactly {verbatim_marker(topic)} as its title (e.g. \"## 4. {verbatim_marker(topic)}\"), and no text below it.\n"
+    )
+
+def get_verbatim_topics(user_inputs):
+    """Returns the topics that can be rendered locally for these inputs."""
+    if user_inputs["language"] not in VERBATIM_LANGUAGES:
+        return frozenset()
+    return frozenset(topic for topic, rules in get_rule_pack(user_inputs).rules.items() if rules.get("verbatim"))
+
+@functools.lru_cache(maxsize=None)
+def get_verbatim_template(topic, role_key, pack=DEFAULT_RULE_PACK):
+    """Compiles (once per topic, role and rule pack) the final text of a verbatim clause, without its heading."""
+    rules = pack.rules[topic]
+    items = get_topic_instructions(rules, role_key)
+    if isinstance(items, str):
+        items = [items]
+    items = [_VERBATIM_DIRECTIVE_RE.sub("", item).strip() for item in items]
+    if "defined_term" in rules:
+        items = [f'**"{rules["defined_term"]}"** means {" ".join(items).rstrip(".")}.']
+    return compile_template("\n\n".join(items))
+
+def render_verbatim_body(topic, user_inputs):
+    """Renders the text of a verbatim clause locally, filling its placeholders from the user inputs."""
+    role_key = get_role_key(user_inputs["party_role"])
+    return fill_template(get_verbatim_template(topic, role_key, get_rule_pack(user_inputs)), user_inputs)
+
+def render_verbatim_clause(topic, user_inputs):
+    """Renders a verbatim clause locally, under a level-3 heading like the clauses drafted one by one."""
+    return f"### {topic}\n\n" + render_verbatim_body(topic, user_inputs)
+
+def replace_verbatim_markers(text, user_inputs):
+    """
+    Replaces the verbatim clause markers in a generated draft with the locally rendered clauses.
+    A marker titling a heading keeps the model's heading (and numbering); a bare marker gets a level-3 heading.
+    Returns (text, topics merged).
+    """
+    verbatim_topics = get_verbatim_topics(user_inputs)
+    merged = set()
+
+    def replace(match):
+        topic = match.group("topic").strip()
+        if topic not in verbatim_topics:
+            return match.group(0)
+        merged.add(topic)
+        prefix = match.group("prefix")
+        if _VERBATIM_HEADING_RE.match(prefix):
+            return f"{prefix}{topic}{match.group('suffix').rstrip()}\n\n" + render_verbatim_body(topic, user_inputs)
+        return prefix + render_verbatim_clause(topic, user_inputs)
+
+    return _VERBATIM_MARKER_RE.sub(replace, text), merged
+
+# --- CLAUSE-LEVEL PROMPTS ---
+# Context lines given to a single-clause prompt, for each placeholder the clause uses.
+CLAUSE_CONTEXT_LINES = {
+    "[Party 1 Name]": "- Party 1 (Our Client): [Party 1 Name]\n",
+    "[Party 1 Type and Address]": "- Party 1 Type and Address: [Party 1 Type and Address]\n",
+    "[Party 2 Name]": "- Party 2 (Counterparty): [Party 2 Name]\n",
+    "[Party 2 Type and Address]": "- Party 2 Type and Address: [Party 2 Type and Address]\n",
+    "[Purpose]": "- Purpose of Disclosure: [Purpose]\n",
+    "[Litigation]": "- Dispute Resolution (Litigation): [Litigation]\n",
+    "[Duration]": "- Duration of Confidentiality: [Duration] months\n",
+    "[Effective Date]": "- Effective Date: [Effective Date]\n",
+}
+
+CLAUSE_PROMPT_HEADER = """
+You are an expert legal AI assistant. You are drafting a single clause of a [Nature of Obligations] {document_name}. The other clauses are drafted separately and assembled afterwards.
+
+**CONTEXT:**
+- Our Client's Role: [Party 1 Role].
+- Applicable Law: [Applicable Law]
+- Language of the Contract: [Language]
+"""
+
+CLAUSE_DRAFTING_INSTRUCTIONS = """
+- Start with a markdown level-3 heading (###) giving the title of the clause in the language of the contract.
+- Use capital letters and bold text for Defined Terms introduced by this clause (e.g., **"Confidential Information"**).
+- Refer to the parties as the "Parties", the "Disclosing Party" and the "Receiving Party", and to the contract as the "Agreement".
+- Ensure professional, clear, and unambiguous legal language throughout.
+- Output only the text of this clause, without any of these instructions, commentary, title page or signature block.
+"""
+
+def topic_placeholders(topic, role_key, pack=DEFAULT_RULE_PACK):
+    """Returns the set of placeholders referenced by a clause topic for the given role."""
+    instruction_text = get_topic_instructions(pack.rules[topic], role_key)
+    if isinstance(instruction_text, str):
+        instruction_text = [instruction_text]
+    return {p for item in instruction_text for p in _PLACEHOLDER_RE.findall(item)}
+
+@functools.lru_cache(maxsize=None)
+def get_clause_prompt_template(topic, role_key, pack=DEFAULT_RULE_PACK):
+    """Compiles (once per topic, role and rule pack) the prompt template drafting a single clause."""
+    chunks = [CLAUSE_PROMPT_HEADER.format(document_name=pack.document_name)]
+    # Only the values the clause refers to are given, so unrelated form changes leave the prompt untouched
+    chunks.extend(line for p, line in CLAUSE_CONTEXT_LINES.items() if p in topic_placeholders(topic, role_key, pack))
+    chunks.append("**DRAFTING INSTRUCTIONS:**\n\n")
+    chunks.append(render_topic(topic, pack.rules[topic], role_key))
+    chunks.append("\n--- \n")
+    chunks.append("**FORMATTING INSTRUCTIONS:**\n")
+    chunks.append(CLAUSE_DRAFTING_INSTRUCTIONS)
+    return compile_template("".join(chunks))
+
+def build_clause_prompts(user_inputs):
+    """Builds one prompt per clause topic, in rule order."""
+    role_key = get_role_key(user_inputs["party_role"])
+    pack = get_rule_pack(user_inputs)
+    suffix = PARTY_TOKEN_INSTRUCTIONS if user_inputs.get("party_tokens") else ""
+    return {
+        topic: fill_template(get_clause_prompt_template(topic, role_key, pack), user_inputs) + suffix
+        for topic in pack.rules
+    }
+
+# --- PREFIX-CACHE-FRIENDLY LAYOUT ---
+# Instruction items that restate a list given in full under another topic:
+# {topic: (item prefix, topic holding the full list)}. The prefix layout replaces them with a cross-reference.
+CROSS_REFERENCES = {
+    "Confidential Information": ("Minimum acceptable exclusions", "Exclusions from Confidential Information"),
+}
+
+PREFIX_PROMPT_HEADER = """
+You are an expert legal AI assistant. Your task is to draft a complete {document_name} based on the clause-by-clause instructions below and the request details given at the end.
+Placeholders in square brackets, such as [Party 1 Name], stand for the values listed under REQUEST DETAILS. Always write the value, never the placeholder.
+
+**DRAFTING INSTRUCTIONS - CLAUSE BY CLAUSE:**
+
+"""
+
+def _normalize_item(item):
+    return " ".join(item.split()).lower()
+
+def _dedupe_items(topic, items, seen):
+    """Drops items already given under a previous topic and shortens cross-referenced lists."""
+    kept = []
+    for item in items:
+        key = _normalize_item(item)
+        if key in seen:
+            continue
+        seen.add(key)
+        if topic in CROSS_REFERENCES and item.startswith(CROSS_REFERENCES[topic][0]):
+            prefix, other_topic = CROSS_REFERENCES[topic]
+            mandatory = " (Mandatory)" if "(Mandatory)" in item else ""
+            item = f"{prefix}: as listed under '{other_topic}'.{mandatory}"
+        kept.append(item)
+    return kept
+
+@functools.lru_cache(maxsize=None)
+def get_static_prefix(role_key, verbatim_topics=frozenset(), pack=DEFAULT_RULE_PACK):
+    """
+    Builds (once per rule pack and role) the request-independent part of the prompt: the rules with their
+    placeholders left in place, deduplicated, followed by the formatting instructions.
+    Every request with the same role shares this exact prefix.
+    """
+    chunks = [PREFIX_PROMPT_HEADER.format(document_name=pack.document_name)]
+    seen = set()
+    for topic, rules in pack.rules.items():
+        if topic in verbatim_topics:
+            chunks.append(render_verbatim_marker_instructions(topic))
+            continue
+        items = get_topic_instructions(rules, role_key)
+        if isinstance(items, str):
+            items = [items]
+        chunks.append(render_items(topic, _dedupe_items(topic, items, seen)))
+    chunks.append("\n--- \n")
+    chunks.append("**FINAL FORMATTING INSTRUCTIONS:**\n")
+    chunks.append(GENERAL_DRAFTING_INSTRUCTIONS)
+    return "".join(chunks)
+
+def render_request_details(user_inputs):
+    """Renders the short per-request section listing the value of every placeholder."""
+    lines = ["\n--- \n", "**REQUEST DETAILS:**\n"]
+    lines.extend(f"- {name}: {value(user_inputs)}\n" for name, value in PLACEHOLDERS.items())
+    if user_inputs.get("party_tokens"):
+        lines.append(PARTY_TOKEN_INSTRUCTIONS)
+    return "".join(lines)
+
+def build_prompt_sections(user_inputs, local_verbatim=False):
+    """
+    Returns the prompt as ordered (section name, text) pairs: the static, role-specific rules
+    prefix first and the per-request values last, so prompts share the longest possible prefix
+    for provider-side context caching.
+    """
+    role_key = get_role_key(user_inputs["party_role"])
+    verbatim_topics = get_verbatim_topics(user_inputs) if local_verbatim else frozenset()
+    return [
+        ("rules", get_static_prefix(role_key, verbatim_topics, get_rule_pack(user_inputs))),
+        ("request", render_request_details(user_inputs)),
+    ]
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token), used when no tokenizer is at hand."""
+    return (len(text) + 3) // 4
+
+def prompt_token_report(user_inputs, local_verbatim=False, count_tokens=estimate_tokens):
+    """
+    Returns the token count of each prompt section, and the share of the prompt that is a
+    static prefix (i.e. reusable by a prefix/context cache). `count_tokens(text)` can be an
+    exact tokenizer such as GeminiClient.count_tokens.
+    """
+    sections = [
+        {"section": name, "static": name == "rules", "characters": len(text), "tokens": count_tokens(text)}
+        for name, text in build_prompt_sections(user_inputs, local_verbatim)
+    ]
+    total = sum(section["tokens"] for section in sections)
+    static = sum(section["tokens"] for section in sections if section["static"])
+    return {
+        "sections": sections,
+        "total_tokens": total,
+        "cacheable_share": static / total if total else 0.0,
+    }
+
+# --- INCREMENTAL RE-DRAFTING ---
+# Placeholders whose change affects every clause: the role selects other instructions and the language
+# changes the whole text. Any other change only affects the clauses whose prompt uses the placeholder.
+FULL_REDRAFT_PLACEHOLDERS = {"[Party 1 Role]", "[Nature of Obligations]", "[Language]"}
+# Placeholders of the header every clause prompt starts with (e.g. the applicable law)
+CLAUSE_HEADER_PLACEHOLDERS = frozenset(_PLACEHOLDER_RE.findall(CLAUSE_PROMPT_HEADER))
+
+@functools.lru_cache(maxsize=None)
+def get_placeholder_index(role_key, pack=DEFAULT_RULE_PACK):
+    """
+    Maps (once per role and rule pack) each placeholder to the clause topics whose prompt uses it,
+    in the clause header or in the topic's instructions.
+    """
+    index = {p: [] for p in PLACEHOLDERS}
+    for topic in pack.rules:
+        for p in CLAUSE_HEADER_PLACEHOLDERS | topic_placeholders(topic, role_key, pack):
+            index[p].append(topic)
+    return {p: frozenset(topics) for p, topics in index.items()}
+
+def changed_placeholders(previous_inputs, user_inputs):
+    """Returns the placeholders whose value differs between two sets of user inputs."""
+    return {p for p, value in PLACEHOLDERS.items() if value(previous_inputs) != value(user_inputs)}
+
+def get_affected_topics(previous_inputs, user_inputs):
+    """
+    Returns the clause topics to redraft after the form changed from `previous_inputs` to `user_inputs`,
+    or None when the whole agreement has to be redrafted (including when another rule pack applies).
+    """
+    changed = changed_placeholders(previous_inputs, user_inputs)
+    pack = get_rule_pack(user_inputs)
+    if changed & FULL_REDRAFT_PLACEHOLDERS or get_rule_pack(previous_inputs) is not pack:
+        return None
+    index = get_placeholder_index(get_role_key(user_inputs["party_role"]), pack)
+    return frozenset(topic for p in changed for topic in index[p])
+
+# --- PARTY-AGNOSTIC DRAFTING ---
+# Symbolic tokens standing for the party details, so a draft only depends on the structural inputs
+# (role, law, language, duration, purpose...) and can be reused for any counterparty.
+PARTY_TOKENS = {
+    "client_name": "{{PARTY_1_NAME}}",
+    "client_type_and_address": "{{PARTY_1_ADDRESS}}",
+    "counterparty_name": "{{PARTY_2_NAME}}",
+    "counterparty_type_and_address": "{{PARTY_2_ADDRESS}}",
+    "effective_date": "{{EFFECTIVE_DATE}}",
+}
+_PARTY_TOKEN_RE = re.compile("|".join(re.escape(token) for token in PARTY_TOKENS.values()))
+# A token name with any (or no) braces around it: what is left of a token the model wrote slightly wrong
+_PARTY_TOKEN_FRAGMENT_RE = re.compile(r"(?:\{+\s*)?\b(?:" + "|".join(token.strip("{}") for token in PARTY_TOKENS.values()) + r")\b(?:\s*\}+)?")
+
+PARTY_TOKEN_INSTRUCTIONS = """
+- Party details are given as tokens such as {{PARTY_1_NAME}} or {{EFFECTIVE_DATE}}. Write these tokens exactly as given, wherever the value belongs; they are replaced with the real values afterwards.
+"""
+
+def anonymize_inputs(user_inputs):
+    """Returns a copy of the inputs with the party names, addresses and effective date replaced by tokens."""
+    return {**user_inputs, **PARTY_TOKENS, "party_tokens": True}
+
+def party_values(user_inputs):
+    """Maps each party token to its real value, formatted like the placeholders are."""
+    values = {token: str(user_inputs[field]) for field, token in PARTY_TOKENS.items() if field != "effective_date"}
+    values[PARTY_TOKENS["effective_date"]] = PLACEHOLDERS["[Effective Date]"](user_inputs)
+    return values
+
+def substitute_parties(text, user_inputs):
+    """Replaces the party tokens of a party-agnostic draft with the real values, in a single pass."""
+    values = party_values(user_inputs)
+    return _PARTY_TOKEN_RE.sub(lambda match: values[match.group(0)], text)
+
+def party_token_fragments(text):
+    """Returns the party tokens left in a substituted draft (e.g. "{PARTY_1_NAME}"), in order of appearance."""
+    return list(dict.fromkeys(match.group(0) for match in _PARTY_TOKEN_FRAGMENT_RE.finditer(text)))
@@ -0,0 +1,9 @@
+# tests/conftest.py
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# The benchmarks' stub model (stub_llm) stands in for the Gemini API
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
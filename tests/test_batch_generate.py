@@ -0,0 +1,22 @@
+# tests/test_batch_generate.py
+
+import pytest
+
+from batch_generate import normalize_record
+from test_party_tokens import USER_INPUTS
+
+def test_normalize_record_fills_in_derived_fields():
+    record = {key: value for key, value in USER_INPUTS.items() if key not in ("nature_of_obligations", "effective_date")}
+    user_inputs = normalize_record({**record, "party_role": "Both (Bilateral)"}, 7)
+    assert user_inputs["id"] == "00007"
+    assert user_inputs["nature_of_obligations"] == "Bilateral"
+    assert user_inputs["effective_date"] == "Today"
+
+@pytest.mark.parametrize("field, value", [
+    ("party_role", "Receiving"),
+    ("applicable_law", "German Law"),
+    ("language", "english"),
+])
+def test_normalize_record_rejects_unknown_values(field, value):
+    with pytest.raises(ValueError, match=rf"Record A-12 has an invalid {field}"):
+        normalize_record({**USER_INPUTS, "id": "A-12", field: value}, 1)
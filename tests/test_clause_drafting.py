@@ -0,0 +1,30 @@
+# tests/test_clause_drafting.py
+
+import datetime
+import json
+
+from clause_drafting import draft_clauses, assemble_clauses, redraft_clauses
+from test_compliance import USER_INPUTS, fake_generate
+
+def through_json(state):
+    """Stores and loads a draft's state like the job queue does (the previous draft is in the job payload)."""
+    return json.loads(json.dumps(state, default=str))
+
+def test_redraft_splices_the_changed_clause_into_a_stored_draft():
+    user_inputs = {**USER_INPUTS, "effective_date": datetime.date(2026, 1, 1)}
+    clauses = draft_clauses(user_inputs, fake_generate)
+    previous = through_json({"user_inputs": user_inputs, "text": assemble_clauses(clauses), "clauses": clauses})
+
+    calls = []
+    def generate(prompt, on_model=None):
+        calls.append(prompt)
+        return fake_generate(prompt).replace("Redrafted", "Updated")
+    # The form still holds a date, the stored draft its string: only the duration changed
+    text, redrafted = redraft_clauses(previous, {**user_inputs, "duration": 24}, generate)
+
+    assert len(calls) == 1
+    assert redrafted["Duration"] == "### Duration\n\nUpdated Duration."
+    assert text == previous["text"].replace("Redrafted Duration.", "Updated Duration.")
+    assert {topic: clause for topic, clause in redrafted.items() if topic != "Duration"} == {
+        topic: clause for topic, clause in previous["clauses"].items() if topic != "Duration"
+    }
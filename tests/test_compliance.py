@@ -0,0 +1,198 @@
+# tests/test_compliance.py
+
+import re
+
+import pytest
+
+from compliance import (
+    heading_title, match_topic, get_scanner, scan_draft, merge_missing_clauses, merge_verbatim_clauses, enforce_compliance,
+)
+from rules_engine import DEFAULT_RULE_PACK
+
+USER_INPUTS = {
+    "client_name": "OCP",
+    "client_type_and_address": "Public Company, Casablanca, Morocco",
+    "counterparty_name": "Tech Solutions Inc.",
+    "counterparty_type_and_address": "Private Company, Paris, France",
+    "language": "English",
+    "duration": 36,
+    "party_role": "Receiving Party",
+    "effective_date": "2026-01-01",
+    "nature_of_obligations": "Unilateral",
+    "purpose": "To evaluate a potential partnership.",
+    "applicable_law": "English Law",
+    "litigation": "Arbitration under ICC Rules, seat in Paris",
+}
+
+def topic_of(title):
+    return match_topic(title, get_scanner(DEFAULT_RULE_PACK)[1])
+
+def full_draft(topics=None):
+    """A draft with one level-2 heading per topic (all of them by default), under the document title."""
+    topics = list(DEFAULT_RULE_PACK.rules) if topics is None else topics
+    return "# Non-Disclosure Agreement\n\n" + "\n\n".join(f"## {topic}\n\nText of {topic}." for topic in topics)
+
+def fake_generate(prompt, on_model=None):
+    """Drafts a clause titled after the topic of its prompt."""
+    topic = re.search(r"\*\*Clause Topic: (.+?)\*\*", prompt).group(1)
+    return f"### {topic}\n\nRedrafted {topic}."
+
+@pytest.mark.parametrize("line, title", [
+    ("# Non-Disclosure Agreement", None),
+    ("## Article 5. Use of Confidential Information", "Use of Confidential Information"),
+    ("**3. Permitted Use**", "Permitted Use"),
+    ("ARTICLE IV: GENERAL PROVISIONS", "GENERAL PROVISIONS"),
+    ("## Article 2 – Objet", "Objet"),
+    ("### 4.1 Notices:", "Notices"),
+])
+def test_heading_title(line, title):
+    assert heading_title(line) == title
+
+@pytest.mark.parametrize("title, topic", [
+    ("Use of Confidential Information", "Use of Confidential Information"),
+    ("Permitted Use", "Permitted Use"),
+    ("Utilisation Autorisée", "Permitted Use"),
+    ("Definitions", "Confidential Information"),
+    ("Third-Party Disclosure", "Third-Party"),
+    ("Term and Termination", "Duration"),
+    ("Termination", None),
+    ("Obligations of the Parties", None),
+    ("Disclosure", None),
+    ("General Obligations", None),
+])
+def test_match_topic(title, topic):
+    assert topic_of(title) == topic
+
+def test_scan_complete_draft():
+    report = scan_draft(full_draft(), USER_INPUTS)
+    assert report["missing_topics"] == []
+    assert report["ok"]
+
+def test_text_before_the_first_clause_is_the_preamble():
+    text = "# Non-Disclosure Agreement\n\n**CONFIDENTIAL**\n\nBetween OCP and Tech Solutions Inc.\n\n## Purpose\n\nText.\n\n## Permitted Use\n\nText."
+    report = scan_draft(text, USER_INPUTS)
+    assert report["positions"] == {"Preamble and Parties": text.index("Between"), "Purpose": text.index("## Purpose"), "Permitted Use": text.index("## Permitted Use")}
+    assert "Legally Required Disclosure" in report["missing_topics"]
+
+def test_document_title_is_not_a_preamble():
+    text = "# Non-Disclosure Agreement\n\n## Purpose\n\nText.\n\n## Permitted Use\n\nText."
+    report = scan_draft(text, USER_INPUTS)
+    assert set(report["positions"]) == {"Purpose", "Permitted Use"}
+    assert "Preamble and Parties" in report["missing_topics"]
+
+def test_heading_counts_for_one_topic():
+    report = scan_draft("## Use of Confidential Information\n\nText.", USER_INPUTS)
+    assert list(report["positions"]) == ["Use of Confidential Information"]
+    assert "Permitted Use" in report["missing_topics"]
+
+def test_placeholders_and_inconsistent_terms():
+    text = full_draft() + "\n\nSigned on [Effective Date] by [Signatory]. The confidential information is protected."
+    report = scan_draft(text, USER_INPUTS)
+    assert report["placeholders"] == {"[Effective Date]": 1, "[Signatory]": 1}
+    assert report["unknown_placeholders"] == ["[Signatory]"]
+    assert report["inconsistent_terms"] == {"Confidential Information": ["confidential information"]}
+    assert not report["ok"]
+
+def test_merge_after_previous_topic():
+    text = "# Non-Disclosure Agreement\n\n## Purpose\n\nText.\n\n## Permitted Use\n\nText."
+    positions = scan_draft(text, USER_INPUTS)["positions"]
+    missing = {topic: f"## {topic}" for topic in ("Preamble and Parties", "Representatives", "Confidential Information", "Third-Party")}
+    merged = merge_missing_clauses(text, missing, positions, DEFAULT_RULE_PACK)
+    headings = [line for line in merged.splitlines() if line.startswith("#")]
+    assert headings == [
+        "# Non-Disclosure Agreement",
+        "## Preamble and Parties",
+        "## Purpose",
+        "## Representatives",
+        "## Confidential Information",
+        "## Third-Party",
+        "## Permitted Use",
+    ]
+
+def test_merge_at_end_when_nothing_found():
+    merged = merge_missing_clauses("Some text.", {"Purpose": "## Purpose"}, {}, DEFAULT_RULE_PACK)
+    assert merged == "Some text.\n\n## Purpose"
+
+def test_enforce_compliance_redrafts_missing_mandatory_clauses_in_order():
+    topics = list(DEFAULT_RULE_PACK.rules)
+    kept = [topic for topic in topics if topic not in ("Representatives", "Confidential Information", "Duration")]
+    text, clauses, report = enforce_compliance(full_draft(kept), USER_INPUTS, fake_generate, local_verbatim=False)
+    assert clauses is None
+    assert report["missing_topics"] == ["Representatives", "Confidential Information", "Duration"]
+    assert report["redrafted_topics"] == ["Representatives", "Confidential Information"]
+    found = scan_draft(text, USER_INPUTS)
+    assert found["missing_topics"] == ["Duration"]
+    assert sorted(found["positions"], key=found["positions"].get) == [topic for topic in topics if topic != "Duration"]
+
+LLM_DRAFT = """# NON-DISCLOSURE AGREEMENT
+
+This Agreement is entered into as of 2026-01-01 (the "Effective Date") by and between OCP, a Public Company, Casablanca, Morocco ("OCP" or the "Receiving Party"), and Tech Solutions Inc., a Private Company, Paris, France (the "Disclosing Party").
+
+## 1. Definitions
+
+1.1 **"Confidential Information"** means the technical and commercial information listed in Schedule 1, disclosed in writing and marked "Confidential".
+
+1.2 **"Representatives"** means the employees and directors of the Receiving Party who need to know the Confidential Information for the Purpose.
+
+1.3 **"Purpose"** means the evaluation of a potential partnership between the Parties.
+
+## 2. Obligations of the Receiving Party
+
+2.1 The Receiving Party shall keep the Confidential Information confidential and use it solely for the Purpose.
+
+2.2 The obligations above do not apply to information that (a) is public, (b) is received from a third party without breach, (c) is already known to the Receiving Party or (d) is independently developed.
+
+## 3. Term
+
+This Agreement remains in force for 36 months from the Effective Date.
+
+## 4. Non-Solicitation
+
+Neither Party shall solicit the employees of the other Party during the term of this Agreement.
+
+## 5. Governing Law and Jurisdiction
+
+This Agreement is governed by English Law. Any dispute is settled by Arbitration under ICC Rules, seat in Paris.
+
+## 6. Amendment
+
+This Agreement may only be amended in writing signed by both Parties.
+
+## 7. Assignment
+
+Neither Party may assign this Agreement without the prior written consent of the other Party.
+
+IN WITNESS WHEREOF, the Parties have signed this Agreement on the Effective Date.
+"""
+
+def test_realistic_draft_is_not_redrafted():
+    def generate(prompt, on_model=None):
+        raise AssertionError("no clause should be redrafted")
+    text, clauses, report = enforce_compliance(LLM_DRAFT, USER_INPUTS, generate, local_verbatim=False)
+    assert report["missing_mandatory"] == []
+    assert report["redrafted_topics"] == []
+    assert "Preamble and Parties" not in report["missing_topics"]
+    assert "Representatives" not in report["missing_topics"]
+    assert text == LLM_DRAFT
+
+def test_merge_verbatim_clauses_keeps_numbering_and_rule_order():
+    lines = []
+    for number, topic in enumerate(DEFAULT_RULE_PACK.rules, start=1):
+        if topic == "Third-Party":
+            lines.append(f"## {number}. [[Clause: Third-Party]]")
+        elif topic == "Notices":
+            lines.append("[[Clause: Notices]]")
+        elif topic not in ("Legally Required Disclosure", "Responsibility"):
+            lines.append(f"## {number}. {topic}\n\nText of {topic}.")
+    text = merge_verbatim_clauses("\n\n".join(lines) + "\n\nSigned for and on behalf of OCP", USER_INPUTS)
+
+    assert "## 5. Third-Party\n\n" in text and "### Third-Party" not in text
+    assert "### Notices\n\n" in text
+    assert "[[Clause:" not in text
+    assert text.rstrip().endswith("Signed for and on behalf of OCP")
+    order = [text.index(heading) for heading in (
+        "## 6. Permitted Use", "### Legally Required Disclosure", "## 8. Exclusions",
+        "## 10. Duration", "### Responsibility", "### Notices", "## 13. Applicable Law",
+    )]
+    assert order == sorted(order)
+
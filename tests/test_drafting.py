@@ -0,0 +1,57 @@
+# tests/test_drafting.py
+
+from drafting import draft_nda
+from test_party_tokens import USER_INPUTS
+
+class DictCache:
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def set(self, key, value):
+        self.entries[key] = value
+
+class FallbackClient:
+    """Answers from the fallback model, as after the primary model failed."""
+
+    model_name = "primary"
+    calls = 0
+
+    def generate(self, prompt, on_usage=None, on_model=None):
+        self.calls += 1
+        if on_model is not None:
+            on_model("fallback")
+        return "## 1. Preamble\n\nText."
+
+def draft(client, cache, use_cache=True):
+    options = {"stream": False, "check_compliance": False, "use_cache": use_cache}
+    return draft_nda(USER_INPUTS, client, cache=cache, options=options, record=False)
+
+def test_fallback_answers_are_not_cached():
+    client, cache = FallbackClient(), DictCache()
+    draft(client, cache)
+    assert cache.entries == {}
+    draft(client, cache)
+    assert client.calls == 2
+
+def test_bypassing_the_cache_replaces_the_cached_response():
+    client, cache = FallbackClient(), DictCache()
+    client.model_name = "fallback"
+    draft(client, cache)
+    (key,) = cache.entries
+    cache.entries[key] = "stale"
+    draft(client, cache, use_cache=False)
+    assert cache.entries[key] != "stale"
+    assert client.calls == 2
+    draft(client, cache)
+    assert client.calls == 2
+
+def test_exact_token_count_uses_the_client_tokenizer():
+    client = FallbackClient()
+    client.count_tokens = len
+    options = {"stream": False, "check_compliance": False, "exact_token_count": True}
+    report = draft_nda(USER_INPUTS, client, options=options, record=False)["prompt_report"]
+    assert report["exact"]
+    assert [section["tokens"] for section in report["sections"]] == [section["characters"] for section in report["sections"]]
@@ -0,0 +1,52 @@
+# tests/test_gemini_client.py
+
+import pytest
+from google.api_core import exceptions as google_exceptions
+
+from gemini_client import GeminiClient
+from stub_llm import StubConfig, stub_model_factory
+
+def make_client(errors=None, retries=2):
+    """
+    A client on stub models answering at once. `errors` maps a model name to the errors its
+    first requests raise, in order.
+    """
+    factory = stub_model_factory(StubConfig(latency=0, jitter=0, output_tokens=3, seed=1))
+    client = GeminiClient(model_name="primary", fallback_model_name="fallback", retries=retries, backoff=0, model_factory=factory)
+    for model_name, model_errors in (errors or {}).items():
+        model = client.get_model(model_name)
+        pending, generate_content = list(model_errors), model.generate_content
+
+        def failing(prompt, stream=False, request_options=None, model=model, pending=pending, generate_content=generate_content):
+            if pending:
+                model.calls += 1
+                raise pending.pop(0)
+            return generate_content(prompt, stream=stream, request_options=request_options)
+        model.generate_content = failing
+    return client, factory.models
+
+def test_transient_errors_are_retried():
+    client, models = make_client({"primary": [google_exceptions.ServiceUnavailable("overloaded"), TimeoutError()]})
+    answered = []
+    assert client.generate("prompt", on_model=answered.append)
+    assert models["primary"].calls == 3
+    assert "fallback" not in models
+    assert answered == ["primary"]
+
+def test_model_errors_move_straight_to_the_fallback():
+    client, models = make_client({"primary": [google_exceptions.NotFound("retired model")]})
+    answered = []
+    assert "".join(client.stream("prompt", on_model=answered.append))
+    assert models["primary"].calls == 1
+    assert models["fallback"].calls == 1
+    assert answered == ["fallback"]
+
+def test_error_is_raised_once_every_model_is_exhausted():
+    client, models = make_client({
+        "primary": [google_exceptions.ServiceUnavailable("overloaded")] * 2,
+        "fallback": [google_exceptions.ResourceExhausted("quota")] * 2,
+    }, retries=1)
+    with pytest.raises(google_exceptions.ResourceExhausted):
+        client.generate("prompt")
+    assert models["primary"].calls == 2
+    assert models["fallback"].calls == 2
@@ -0,0 +1,67 @@
+# tests/test_job_queue.py
+
+import json
+import threading
+import time
+
+from job_queue import JobQueue, QUEUED, RUNNING, DONE, FAILED
+
+def wait_for(queue, job_id, timeout=5):
+    """Polls a job until it is finished; returns it."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job["status"] in (DONE, FAILED):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} is still {job['status']}")
+
+def echo(payload, progress):
+    progress(f"drafting {payload['name']}")
+    return {"text": payload["name"].upper()}
+
+def test_job_runs_and_publishes_its_result(tmp_path):
+    queue = JobQueue(echo, path=str(tmp_path / "jobs.sqlite3"))
+    job = wait_for(queue, queue.submit({"name": "nda"}))
+    assert job["status"] == DONE
+    assert job["result"] == {"text": "NDA"}
+    assert job["progress"] is None
+
+def test_failed_job_keeps_its_error(tmp_path):
+    def fail(payload, progress):
+        raise ValueError("quota exceeded")
+    queue = JobQueue(fail, path=str(tmp_path / "jobs.sqlite3"))
+    job = wait_for(queue, queue.submit({"name": "nda"}))
+    assert job["status"] == FAILED
+    assert job["error"] == "ValueError: quota exceeded"
+    assert job["result"] is None
+
+def test_interrupted_jobs_are_resumed_on_start(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    stopped = JobQueue(echo, path=path)
+    # As left by a process stopped while drafting: one job running, one still queued
+    for job_id, status in (("running", RUNNING), ("queued", QUEUED)):
+        stopped._execute(
+            "INSERT INTO jobs (id, status, payload, created_at, started_at) VALUES (?, ?, ?, ?, ?)",
+            (job_id, status, json.dumps({"name": job_id}), time.time(), time.time() if status == RUNNING else None),
+        )
+    queue = JobQueue(echo, path=path)
+    assert wait_for(queue, "running")["result"] == {"text": "RUNNING"}
+    assert wait_for(queue, "queued")["result"] == {"text": "QUEUED"}
+
+def test_finished_jobs_are_pruned_after_the_retention(tmp_path):
+    release = threading.Event()
+    def handler(payload, progress):
+        if payload["name"] == "slow":
+            release.wait(5)
+        return {}
+    queue = JobQueue(handler, path=str(tmp_path / "jobs.sqlite3"), retention_seconds=0.05)
+    finished = queue.submit({"name": "fast"})
+    wait_for(queue, finished)
+    pending = queue.submit({"name": "slow"})
+    time.sleep(0.1)
+    queue.prune()
+    assert queue.get(finished) is None
+    assert queue.get(pending)["status"] in (QUEUED, RUNNING)
+    release.set()
+    assert wait_for(queue, pending)["status"] == DONE
@@ -0,0 +1,56 @@
+# tests/test_party_tokens.py
+
+import io
+import zipfile
+
+from drafting import draft_nda, draft_docx
+from rules_engine import anonymize_inputs, substitute_parties, party_token_fragments
+
+USER_INPUTS = {
+    "client_name": "OCP",
+    "client_type_and_address": "Public Company, Casablanca, Morocco",
+    "counterparty_name": "Tech Solutions Inc.",
+    "counterparty_type_and_address": "Private Company, Paris, France",
+    "language": "English",
+    "duration": 36,
+    "party_role": "Receiving Party",
+    "effective_date": "2026-01-01",
+    "nature_of_obligations": "Unilateral",
+    "purpose": "To evaluate a potential partnership.",
+    "applicable_law": "English Law",
+    "litigation": "Arbitration under ICC Rules, seat in Paris",
+}
+
+class FakeClient:
+    """Answers every prompt with the same text, which writes one party token slightly wrong."""
+
+    model_name = "fake"
+    text = "## Preamble\n\nBetween {{PARTY_1_NAME}} and {PARTY_2_NAME}, as of {{EFFECTIVE_DATE}}."
+
+    def generate(self, prompt, on_usage=None, on_model=None):
+        if on_model is not None:
+            on_model(self.model_name)
+        return self.text
+
+    def stream(self, prompt, on_usage=None, on_model=None):
+        if on_model is not None:
+            on_model(self.model_name)
+        yield self.text
+
+def test_substitute_parties():
+    inputs = anonymize_inputs(USER_INPUTS)
+    text = substitute_parties(f"{inputs['client_name']} and {inputs['counterparty_name']}", USER_INPUTS)
+    assert text == "OCP and Tech Solutions Inc."
+
+def test_party_token_fragments():
+    text = "Between {PARTY_1_NAME} and PARTY_2_NAME, on {{EFFECTIVE_DATE}. PARTY_1_NAMES is a word."
+    assert party_token_fragments(text) == ["{PARTY_1_NAME}", "PARTY_2_NAME", "{{EFFECTIVE_DATE}"]
+
+def test_party_agnostic_draft_reports_fragments_and_fills_docx():
+    result = draft_nda(USER_INPUTS, FakeClient(), options={"party_agnostic": True, "use_cache": False, "check_compliance": True}, record=False)
+    assert "Between OCP and {PARTY_2_NAME}, as of 2026-01-01." in result["text"]
+    assert result["compliance"]["party_token_fragments"] == ["{PARTY_2_NAME}"]
+    assert not result["compliance"]["ok"]
+    document = zipfile.ZipFile(io.BytesIO(draft_docx(result))).read("word/document.xml").decode("utf-8")
+    assert "Between OCP and" in document
+    assert "{{PARTY_1_NAME}}" not in document
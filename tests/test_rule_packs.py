@@ -0,0 +1,37 @@
+# tests/test_rule_packs.py
+
+import json
+import logging
+
+import pytest
+
+from rule_packs import RulePackRegistry, RulePackError, parse_rule_pack
+from rules_engine import DEFAULT_RULE_PACK, NDA_DRAFTING_RULES
+
+def pack_data(name, **fields):
+    return {"name": name, "contract_type": "NDA", "roles": ["receiving", "disclosing", "mutual"], "rules": NDA_DRAFTING_RULES, **fields}
+
+def write_pack(directory, name, data):
+    (directory / f"{name}.json").write_text(data if isinstance(data, str) else json.dumps(data), encoding="utf-8")
+
+def test_invalid_packs_are_skipped(tmp_path, caplog):
+    write_pack(tmp_path, "broken", "{not json")
+    write_pack(tmp_path, "no-rules", pack_data("no-rules", rules={}))
+    write_pack(tmp_path, "french", pack_data("french", laws=["French Law"]))
+    # Overlaps the French pack on one of its keys: rejected as a whole
+    write_pack(tmp_path, "overlap", pack_data("overlap", roles=["mutual"], laws=["French Law", "Moroccan Law"]))
+    registry = RulePackRegistry(DEFAULT_RULE_PACK, directory=str(tmp_path))
+
+    with caplog.at_level(logging.WARNING, logger="nda.rule_packs"):
+        assert registry.select("NDA", "receiving", "English Law", "English") is DEFAULT_RULE_PACK
+    assert len(caplog.records) == 3
+    assert registry.select("NDA", "mutual", "French Law", "French").name == "french"
+    assert registry.select("NDA", "mutual", "Moroccan Law", "French") is DEFAULT_RULE_PACK
+    # Loaded once: the skipped packs are not read again
+    caplog.clear()
+    registry.select("NDA", "receiving", "English Law", "English")
+    assert not caplog.records
+
+def test_packs_must_use_the_nda_roles():
+    with pytest.raises(RulePackError, match="unknown role"):
+        parse_rule_pack(pack_data("msa", roles=["buyer", "seller"]), "msa.json")
@@ -0,0 +1,31 @@
+# tests/test_rules_engine.py
+
+import json
+
+import rules_engine
+from rules_engine import DEFAULT_RULE_PACK, NDA_DRAFTING_RULES, get_affected_topics
+from rule_packs import RulePackRegistry
+from test_party_tokens import USER_INPUTS
+
+def test_duration_change_affects_only_its_clause():
+    assert get_affected_topics(USER_INPUTS, {**USER_INPUTS, "duration": 24}) == {"Duration"}
+
+def test_counterparty_change_affects_the_clauses_naming_it():
+    changed = {**USER_INPUTS, "counterparty_type_and_address": "Private Company, Lyon, France"}
+    assert get_affected_topics(USER_INPUTS, changed) == {"Preamble and Parties", "Notices"}
+
+def test_law_change_affects_every_clause():
+    # The applicable law is in the header of every clause prompt
+    assert get_affected_topics(USER_INPUTS, {**USER_INPUTS, "applicable_law": "French Law"}) == set(DEFAULT_RULE_PACK.rules)
+
+def test_role_change_needs_a_full_redraft():
+    changed = {**USER_INPUTS, "party_role": "Both (Bilateral)", "nature_of_obligations": "Bilateral"}
+    assert get_affected_topics(USER_INPUTS, changed) is None
+
+def test_rule_pack_change_needs_a_full_redraft(tmp_path, monkeypatch):
+    pack = {"name": "nda-french-law", "contract_type": "NDA", "roles": ["receiving", "disclosing", "mutual"],
+            "laws": ["French Law"], "rules": NDA_DRAFTING_RULES}
+    (tmp_path / "nda-french-law.json").write_text(json.dumps(pack), encoding="utf-8")
+    monkeypatch.setattr(rules_engine, "RULE_PACKS", RulePackRegistry(DEFAULT_RULE_PACK, directory=str(tmp_path)))
+    assert get_affected_topics(USER_INPUTS, {**USER_INPUTS, "applicable_law": "French Law"}) is None
+    assert get_affected_topics({**USER_INPUTS, "applicable_law": "French Law"}, {**USER_INPUTS, "applicable_law": "French Law", "duration": 12}) == {"Duration"}